@@ -0,0 +1,253 @@
+"""Store-level benchmarks on synthetic rosters.
+
+    python benchmark.py                                  # 1k, 10k and 100k students
+    python benchmark.py --sizes 1000000 --courses 50
+    python benchmark.py --output new.json --compare old.json
+
+Each result records the best and median wall time of a few repeats (and the
+time per operation for batches of operations); memory results record bytes.
+Results are written as JSON together with the commit and Python version, and
+--compare prints the ratio of every timing to a previous results file.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import records
+from roster_generator import write_roster, student_id
+from snapshot import snapshot_path
+from store import STUDENT_FIELDS, QUERY_CRITERIA, StudentStore, CourseStore, clear_parse_cache
+from validation import STUDENT_VALIDATOR
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_COURSES = 20
+REPEATS = 5
+EDITS = 200  # single-row adds, updates and deletes per repeat
+LOOKUPS = 1000  # duplicate-ID checks per repeat
+
+# Ratio above which --compare flags a timing as slower
+REGRESSION_RATIO = 1.25
+
+
+def open_backend(backend, directory, journaled=False):
+    """Open the student and course stores over the roster in directory."""
+    student_path = os.path.join(directory, 'students.csv')
+    course_path = os.path.join(directory, 'courses.csv')
+    if backend == 'csv':
+        return StudentStore(student_path, journaled=journaled), CourseStore(course_path, journaled=journaled)
+    from sqlite_store import connect, import_csv, SqliteStudentStore, SqliteCourseStore
+    db_path = os.path.join(directory, 'students.db')
+    is_new = not os.path.exists(db_path)
+    conn = connect(db_path)
+    if is_new:
+        import_csv(conn, student_path, course_path)
+    return SqliteStudentStore(conn), SqliteCourseStore(conn)
+
+
+def search_queries(row):
+    """Return a query per search criterion that matches row."""
+    queries = {field: row[index].lower()[:3] for index, field in enumerate(STUDENT_FIELDS)}
+    queries['ID'] = row[3][-5:]
+    queries['Gender'] = row[5][0].lower()
+    queries[QUERY_CRITERIA] = f"last:{row[2].lower()} year:{row[4]}"
+    return queries
+
+
+class Benchmark:
+    """Runs timings and collects their results."""
+
+    def __init__(self, repeats=REPEATS):
+        self.repeats = repeats
+        self.results = []
+
+    def time(self, name, size, backend, run, ops=1, setup=None):
+        """Time run() repeats times.
+
+        setup(repeat), if given, runs untimed before each repeat and its result
+        is passed to run.
+        """
+        times = []
+        for repeat in range(self.repeats):
+            if setup is None:
+                start = time.perf_counter()
+                run()
+            else:
+                state = setup(repeat)
+                start = time.perf_counter()
+                run(state)
+            times.append(time.perf_counter() - start)
+        result = {'name': name, 'size': size, 'backend': backend, 'ops': ops,
+                  'best': min(times), 'median': statistics.median(times), 'per_op': min(times) / ops}
+        self.results.append(result)
+        print(f"{backend:6} {size:>8} {name:28} {result['best'] * 1000:10.2f} ms"
+              + (f"  ({result['per_op'] * 1e6:.1f} us/op)" if ops > 1 else ""))
+        return result
+
+    def memory(self, name, size, backend, run):
+        """Record the memory still allocated by run()'s result, measured with tracemalloc."""
+        tracemalloc.start()
+        kept = run()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del kept
+        self.results.append({'name': name, 'size': size, 'backend': backend, 'bytes': current, 'peak_bytes': peak})
+        print(f"{backend:6} {size:>8} {name:28} {current / 2 ** 20:10.1f} MiB (peak {peak / 2 ** 20:.1f} MiB)")
+
+
+def run_size(bench, size, backend, roster_dir, measure_memory=True):
+    """Run every benchmark on one roster size and backend."""
+    work_dir = tempfile.mkdtemp(prefix='bench-')
+    try:
+        for name in ('students.csv', 'courses.csv'):
+            shutil.copy(os.path.join(roster_dir, name), work_dir)
+        open_backend(backend, work_dir)  # Import into SQLite once, untimed
+
+        # Loading, as the window does: open both stores and add the status column
+        def load(state=None):
+            students, courses = open_backend(backend, work_dir)
+            return records.with_status(students.all())
+        bench.time('load', size, backend, load, setup=lambda repeat: clear_parse_cache())
+        bench.time('load_cached', size, backend, load)  # Files unchanged since the last load
+        if measure_memory:
+            clear_parse_cache()
+            bench.memory('load_memory', size, backend, lambda: open_backend(backend, work_dir))
+            if backend == 'csv':
+                # Just the parsed student rows, without the indexes: what interning their values saves
+                students = open_backend(backend, work_dir)[0]
+
+                def parse_rows():
+                    with open(students.path, "r", newline='', encoding="utf-8") as f:
+                        return students._parse(f)
+                bench.memory('row_memory', size, backend, parse_rows)
+        if backend == 'csv':
+            for store in open_backend(backend, work_dir):
+                store.close()  # Leaves a snapshot of each file
+            bench.time('load_snapshot', size, backend, load, setup=lambda repeat: clear_parse_cache())
+
+        students, courses = open_backend(backend, work_dir, journaled=True)
+        sample = students.get(student_id(size // 2))
+        for criteria, query in search_queries(sample).items():
+            bench.time(f'search[{criteria}]', size, backend, lambda: students.search(criteria, query))
+
+        ids = [student_id(index) for index in range(0, 2 * size, 2 * size // LOOKUPS or 1)][:LOOKUPS]
+        bench.time('duplicate_id', size, backend, lambda: [students.is_duplicate_id(id_value) for id_value in ids],
+                   ops=len(ids))
+        new_rows = [sample[:3] + [student_id(size + index)] + sample[4:] for index in range(LOOKUPS)]
+        bench.time('validate_new_student', size, backend,
+                   lambda: [STUDENT_VALIDATOR.errors(row, {'ID': students.is_duplicate_id}) for row in new_rows],
+                   ops=len(new_rows))
+        bench.time('validate_batch', size, backend,
+                   lambda: STUDENT_VALIDATOR.batch_errors(new_rows, {'ID': students.is_duplicate_id}),
+                   ops=len(new_rows))
+
+        # Single-row edits through the validating records layer, on IDs past the roster
+        edit_rows = new_rows[:EDITS]
+        def remove_edit_rows(repeat):
+            for row in edit_rows:
+                if row[3] in students:
+                    students.delete(row[3])
+
+        def restore_edit_rows(repeat):
+            for row in edit_rows:
+                if row[3] not in students:
+                    students.add(row)
+
+        bench.time('add_student', size, backend, lambda state: [records.add_student(students, courses, row) for row in edit_rows],
+                   ops=len(edit_rows), setup=remove_edit_rows)
+        moved_rows = [row[:4] + [str(int(row[4]) % 4 + 1)] + row[5:] for row in edit_rows]
+        bench.time('update_student', size, backend,
+                   lambda: [records.update_student(students, courses, row[3], row) for row in moved_rows], ops=len(moved_rows))
+        bench.time('delete_student', size, backend,
+                   lambda state: [records.delete_student(students, row[3]) for row in edit_rows], ops=len(edit_rows),
+                   setup=restore_edit_rows)
+
+        # Cascades: rename one course per repeat, then delete one course per repeat
+        codes = courses.keys()
+        repeats = min(bench.repeats, len(codes) // 2)
+        cascade = Benchmark(repeats)
+        cascade.time('rename_course', size, backend,
+                     lambda code: records.update_course(students, courses, code, [code + 'X', courses.get(code)[1]]),
+                     setup=lambda repeat: codes[repeat])
+        cascade.time('delete_course', size, backend,
+                     lambda code: records.delete_course(students, courses, code),
+                     setup=lambda repeat: codes[-1 - repeat])
+        bench.results.extend(cascade.results)
+        students.close()
+        courses.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        for name in ('students.csv', 'courses.csv'):
+            try:
+                os.remove(snapshot_path(os.path.join(work_dir, name)))  # Kept outside work_dir
+            except FileNotFoundError:
+                pass
+
+
+def environment():
+    """Describe where the benchmarks ran."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'commit': commit, 'python': sys.version.split()[0], 'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def compare(results, baseline):
+    """Print each timing next to the same timing in baseline."""
+    previous = {(result['name'], result['size'], result['backend']): result for result in baseline['results']}
+    print(f"\nCompared with {baseline['environment'].get('commit') or 'baseline'}:")
+    for result in results:
+        old = previous.get((result['name'], result['size'], result['backend']))
+        if old is None or 'best' not in result or not old['best']:
+            continue
+        ratio = result['best'] / old['best']
+        flag = "  SLOWER" if ratio > REGRESSION_RATIO else ""
+        print(f"{result['backend']:6} {result['size']:>8} {result['name']:28} {ratio:6.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the student stores on synthetic rosters.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="numbers of students")
+    parser.add_argument('--courses', type=int, default=DEFAULT_COURSES, help="number of courses")
+    parser.add_argument('--backends', nargs='+', choices=['csv', 'sqlite'], default=['csv', 'sqlite'])
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="skip the (slow) tracemalloc measurements")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help="previous results file to compare against")
+    args = parser.parse_args(argv)
+
+    bench = Benchmark(args.repeats)
+    roster_root = tempfile.mkdtemp(prefix='roster-')
+    try:
+        for size in args.sizes:
+            roster_dir = os.path.join(roster_root, str(size))
+            write_roster(roster_dir, size, args.courses, args.seed)
+            for backend in args.backends:
+                run_size(bench, size, backend, roster_dir, not args.no_memory)
+    finally:
+        shutil.rmtree(roster_root, ignore_errors=True)
+
+    output = {'environment': environment(),
+              'parameters': {'courses': args.courses, 'seed': args.seed, 'repeats': args.repeats},
+              'results': bench.results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(bench.results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
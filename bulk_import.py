@@ -0,0 +1,147 @@
+import argparse
+import csv
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from store import STUDENT_FIELDS, open_stores
+from validation import STUDENT_VALIDATOR, student_validator
+
+# Rows validated per worker task
+CHUNK_SIZE = 5000
+
+
+class ImportReport:
+    """Outcome of a bulk import: how many rows were added and why the others were not."""
+
+    def __init__(self):
+        self.imported = 0
+        self.errors = []  # (line number, ID, message)
+
+    def add_error(self, line_number, id_value, message):
+        self.errors.append((line_number, id_value, message))
+
+    def write(self, path):
+        """Write the per-row errors to a CSV file."""
+        with open(path, "w", newline='', encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(['Line', 'ID', 'Error'])
+            writer.writerows(self.errors)
+
+    def summary(self):
+        rejected = len({line_number for line_number, id_value, message in self.errors})
+        return f"{self.imported} students imported, {rejected} rows rejected."
+
+
+def read_chunks(path, chunk_size=CHUNK_SIZE):
+    """Yield lists of (line number, row) from a student CSV, skipping its header."""
+    with open(path, "r", newline='', encoding="utf-8") as f:
+        reader = csv.reader(f)
+        chunk = []
+        for row in reader:
+            if not row:
+                continue
+            if reader.line_num == 1 and [field.strip().lower() for field in row[:len(STUDENT_FIELDS)]] == \
+                    [field.lower() for field in STUDENT_FIELDS]:
+                continue  # Header
+            chunk.append((reader.line_num, row))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def validate_chunk(chunk, course_codes):
+    """Validate a chunk of rows, a column at a time; return (line number, row, errors) for each."""
+    results = []
+    complete = []
+    for line_number, row in chunk:
+        if len(row) != len(STUDENT_FIELDS):
+            results.append((line_number, row, [f"Expected {len(STUDENT_FIELDS)} fields, found {len(row)}."]))
+            continue
+        row = [value.strip() for value in row]
+        results.append((line_number, row, None))
+        complete.append(row)
+    errors = iter(student_validator(course_codes).batch_errors(complete))
+    return [(line_number, row, row_errors if row_errors is not None else next(errors))
+            for line_number, row, row_errors in results]
+
+
+def validated_chunks(chunks, course_codes, workers):
+    """Yield validated chunks in file order, keeping at most 2 * workers chunks in flight."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield validate_chunk(chunk, course_codes)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(validate_chunk, chunk, course_codes))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def import_students(student_store, path, course_codes, workers=None, chunk_size=CHUNK_SIZE):
+    """Validate every row of a student CSV and add the valid ones in one write.
+
+    Rows are checked with the same rules as the Add Student dialog on a pool
+    of worker processes; IDs are checked against the IDs already in the store
+    and earlier in the file. Returns an ImportReport.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if os.path.getsize(path) < chunk_size * 40:
+        workers = 1  # Small file; a process pool costs more than it saves
+
+    report = ImportReport()
+    known_ids = set(student_store.keys())
+    valid_rows = []
+    course_codes = set(course_codes)
+    taken = {'ID': known_ids.__contains__}
+    for results in validated_chunks(read_chunks(path, chunk_size), course_codes, workers):
+        STUDENT_VALIDATOR.unique_errors([row for line_number, row, errors in results],
+                                        [errors for line_number, row, errors in results], taken)
+        for line_number, row, errors in results:
+            id_value = row[3] if len(row) > 3 else ""
+            if errors:
+                for message in errors:
+                    report.add_error(line_number, id_value, message)
+                continue
+            known_ids.add(id_value)
+            valid_rows.append(row)
+
+    student_store.add_many(valid_rows)
+    report.imported = len(valid_rows)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import students from a CSV file.")
+    parser.add_argument('path', help="CSV file with the student columns, with or without a header")
+    parser.add_argument('--report', help="write rejected rows and their errors to this CSV file")
+    parser.add_argument('--workers', type=int, default=None, help="validation processes (default: one per CPU)")
+    parser.add_argument('--backend', choices=['csv', 'sqlite'], default=None, help="storage backend")
+    args = parser.parse_args(argv)
+
+    students, courses = open_stores(args.backend)
+    try:
+        report = import_students(students, args.path, courses.keys(), args.workers)
+    finally:
+        students.close()
+        courses.close()
+
+    print(report.summary())
+    if args.report:
+        report.write(args.report)
+    elif report.errors:
+        for line_number, id_value, message in report.errors:
+            print(f"line {line_number} ({id_value}): {message}", file=sys.stderr)
+    return 1 if report.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
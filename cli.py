@@ -0,0 +1,201 @@
+"""Command-line access to the student and course databases, without Qt.
+
+    python cli.py list students
+    python cli.py search students "Last Name" doe
+    python cli.py search students Query "year:1 course:bscs"
+    python cli.py show student 2022-0101
+    python cli.py add student John A. Doe 2022-0101 1 Male BSCS
+    python cli.py add course BSMA "BS Mathematics"
+    python cli.py update student 2022-0101 "Year Level=2" "Course Code=None"
+    python cli.py delete course BSMA
+    python cli.py import new_students.csv --report errors.csv
+    python cli.py export students students_backup.csv
+    python cli.py counts
+    python cli.py check
+
+Rows are written to standard output as CSV. The exit status is 1 when a
+command fails or, for import and check, when any row has an error.
+"""
+import argparse
+import os
+import sys
+import records
+from file_lock import FileLock
+from journal import Journal
+from row_file import RowFile
+from store import (STUDENT_FIELDS, COURSE_FIELDS, STUDENT_DATABASE, COURSE_DATABASE, QUERY_CRITERIA, BACKEND_ENV,
+                   BACKENDS, open_stores)
+
+TABLES = {'students': STUDENT_FIELDS, 'courses': COURSE_FIELDS}
+SINGULAR = {'student': 'students', 'course': 'courses'}
+FILES = {'students': STUDENT_DATABASE, 'courses': COURSE_DATABASE}
+KEY_FIELDS = {'students': 'ID', 'courses': 'Course Code'}
+
+
+def edited_row(row, fields, assignments):
+    """Return a copy of row with each "Field=value" assignment applied."""
+    row = list(row)
+    for assignment in assignments:
+        field, separator, value = assignment.partition('=')
+        if not separator or field not in fields:
+            raise ValueError(f"Expected Field=value with one of {', '.join(fields)}; got {assignment!r}.")
+        row[fields.index(field)] = value
+    return row
+
+
+def write_rows(rows, fields):
+    records.export_csv(rows, fields, sys.stdout)
+
+
+def show_from_file(args):
+    """Print the row asked for by show straight from its CSV file; return None if the file lacks journaled changes."""
+    table = SINGULAR[args.kind]
+    path, fields = FILES[table], TABLES[table]
+    lock = FileLock(path + '.lock')
+    if Journal(path, lock).has_records():
+        return None  # Only a loaded store sees those
+    with RowFile(path, fields.index(KEY_FIELDS[table]), len(fields), len(fields), lock) as rows:
+        row = rows.get(args.key)
+    if row is None:
+        raise KeyError(f"{args.kind.capitalize()} {args.key} not found.")
+    write_rows([row], fields)
+    return 0
+
+
+def run(args, students, courses):
+    """Run one parsed command; return the exit status."""
+    stores = {'students': students, 'courses': courses}
+
+    if args.command == 'list':
+        write_rows(stores[args.table].all(), TABLES[args.table])
+    elif args.command == 'search':
+        fields = TABLES[args.table]
+        if args.criteria not in fields and not (args.table == 'students' and args.criteria == QUERY_CRITERIA):
+            raise ValueError(f"Unknown search criteria {args.criteria!r}.")
+        write_rows(stores[args.table].search(args.criteria, args.query.strip().lower()), fields)
+    elif args.command == 'show':
+        row = stores[SINGULAR[args.kind]].get(args.key)
+        if row is None:
+            raise KeyError(f"{args.kind.capitalize()} {args.key} not found.")
+        write_rows([row], TABLES[SINGULAR[args.kind]])
+    elif args.command == 'add':
+        if args.kind == 'student':
+            records.add_student(students, courses, args.values)
+        else:
+            records.add_course(courses, args.values)
+    elif args.command == 'update':
+        store = stores[SINGULAR[args.kind]]
+        row = store.get(args.key)
+        if row is None:
+            raise KeyError(f"{args.kind.capitalize()} {args.key} not found.")
+        row = edited_row(row, TABLES[SINGULAR[args.kind]], args.assignments)
+        if args.kind == 'student':
+            records.update_student(students, courses, args.key, row)
+        else:
+            records.update_course(students, courses, args.key, row)
+    elif args.command == 'delete':
+        if args.kind == 'student':
+            records.delete_student(students, args.key)
+        else:
+            records.delete_course(students, courses, args.key)
+    elif args.command == 'import':
+        from bulk_import import import_students  # Pulls in multiprocessing; only needed here
+        report = import_students(students, args.path, courses.keys(), args.workers)
+        print(report.summary(), file=sys.stderr)
+        if args.report:
+            report.write(args.report)
+        else:
+            for line_number, id_value, message in report.errors:
+                print(f"line {line_number} ({id_value}): {message}", file=sys.stderr)
+        return 1 if report.errors else 0
+    elif args.command == 'export':
+        with open(args.path, "w", newline='', encoding="utf-8") as f:
+            records.export_csv(stores[args.table].all(), TABLES[args.table], f)
+    elif args.command == 'counts':
+        write_rows(sorted(records.enrollment_counts(students, courses).items()), ['Course Code', 'Students'])
+    elif args.command == 'check':
+        errors = records.integrity_errors(students, courses)
+        write_rows(errors, ['ID', 'Error'])
+        return 1 if errors else 0
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Manage the student and course databases from the command line.")
+    parser.add_argument('--backend', choices=BACKENDS, default=None, help="storage backend (default: $STUDENT_DB_BACKEND or csv)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('list', help="print every row of a table")
+    command.add_argument('table', choices=TABLES)
+
+    command = commands.add_parser('search', help="print the rows matching a search")
+    command.add_argument('table', choices=TABLES)
+    command.add_argument('criteria', help=f"field to search, or {QUERY_CRITERIA} for the query syntax")
+    command.add_argument('query')
+
+    command = commands.add_parser('show', help="print one student or course")
+    command.add_argument('kind', choices=SINGULAR)
+    command.add_argument('key', help="student ID or course code")
+
+    command = commands.add_parser('add', help="add a student or a course")
+    command.add_argument('kind', choices=SINGULAR)
+    command.add_argument('values', nargs='+', help="the row's fields, in column order")
+
+    command = commands.add_parser('update', help="change fields of a student or a course")
+    command.add_argument('kind', choices=SINGULAR)
+    command.add_argument('key', help="student ID or course code")
+    command.add_argument('assignments', nargs='+', metavar='Field=value')
+
+    command = commands.add_parser('delete', help="delete a student or a course")
+    command.add_argument('kind', choices=SINGULAR)
+    command.add_argument('key', help="student ID or course code")
+
+    command = commands.add_parser('import', help="bulk import students from a CSV file")
+    command.add_argument('path')
+    command.add_argument('--report', help="write rejected rows and their errors to this CSV file")
+    command.add_argument('--workers', type=int, default=None, help="validation processes (default: one per CPU)")
+
+    command = commands.add_parser('export', help="write a table to a CSV file")
+    command.add_argument('table', choices=TABLES)
+    command.add_argument('path')
+
+    commands.add_parser('counts', help="print the number of students in each course")
+    commands.add_parser('check', help="print every stored student that breaks the validation rules")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'add':
+        fields = STUDENT_FIELDS if args.kind == 'student' else COURSE_FIELDS
+        if len(args.values) != len(fields):
+            print(f"Error: expected {len(fields)} values ({', '.join(fields)}).", file=sys.stderr)
+            return 1
+    if args.command == 'show' and (args.backend or os.environ.get(BACKEND_ENV, 'csv')) == 'csv':
+        # One row is found through the row index without loading the whole table
+        try:
+            status = show_from_file(args)
+        except (KeyError, OSError) as e:
+            print(f"Error: {e.args[0] if isinstance(e, KeyError) else e}", file=sys.stderr)
+            return 1
+        if status is not None:
+            return status
+
+    students, courses = open_stores(args.backend, lazy_index=True)
+    try:
+        return run(args, students, courses)
+    except BrokenPipeError:
+        sys.stdout = None  # Output piped into head or the like; nothing left to flush
+        return 0
+    except records.ValidationError as e:
+        print("Error: " + "\nError: ".join(e.errors), file=sys.stderr)
+    except (KeyError, ValueError, OSError) as e:
+        print(f"Error: {e.args[0] if isinstance(e, KeyError) else e}", file=sys.stderr)
+    finally:
+        students.close()
+        courses.close()
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,17 @@
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QMessageBox
 from PyQt5.QtCore import pyqtSignal
-import csv
-import re
-STUDENT_FIELDS = ['Name', 'ID', 'Year Level', 'Gender', 'Course Code','Course Name']
-STUDENT_DATABASE = 'students.csv'
-COURSE_FIELDS = ['Course Code', 'Course Name']
-COURSE_DATABASE = 'courses.csv'
+from store import COURSE_FIELDS
+from records import ValidationError, add_student, update_student, add_course, update_course
+from validation import YEAR_LEVELS, GENDERS
 class AddStudentDialog(QDialog):
-    def __init__(self, parent=None, course_data=None):
+    def __init__(self, parent=None, course_data=None, student_store=None, course_store=None):
         super().__init__(parent)
         self.setWindowTitle("Add Student")
         self.setGeometry(200, 200, 400, 350)
 
         self.course_data = course_data
+        self.student_store = student_store
+        self.course_store = course_store  # The chosen course must still exist
         self.original_scroll_position = None  # Variable to store the scroll position
 
         layout = QVBoxLayout(self)
@@ -32,12 +31,12 @@ class AddStudentDialog(QDialog):
         layout.addWidget(self.id_edit)
 
         self.year_level_combo = QComboBox()
-        self.year_level_combo.addItems(['1', '2', '3', '4'])
+        self.year_level_combo.addItems(YEAR_LEVELS)
         layout.addWidget(QLabel("Year Level:"))
         layout.addWidget(self.year_level_combo)
 
         self.gender_combo = QComboBox()
-        self.gender_combo.addItems(['Male', 'Female'])
+        self.gender_combo.addItems(GENDERS)
         layout.addWidget(QLabel("Gender:"))
         layout.addWidget(self.gender_combo)
 
@@ -56,49 +55,6 @@ class AddStudentDialog(QDialog):
         if parent and hasattr(parent, 'student_table'):
             self.original_scroll_position = parent.student_table.verticalScrollBar().value()
 
-    def validate_student_data(self, student_data):
-        """Validate student data."""
-        first_name, middle_initial, last_name, id_value, year_level, gender, course_code = student_data
-
-        # Check if required fields are not empty
-        if not first_name or not middle_initial or not last_name or not id_value:
-            return False
-
-        # Validate first name format
-        if not self.validate_name_format(first_name):
-            return False
-
-        # Validate last name format
-        if not self.validate_name_format(last_name):
-            return False
-
-        # Validate middle initial format: One uppercase letter followed by a period
-        if len(middle_initial) != 2 or not middle_initial[0].isupper() or middle_initial[1] != '.':
-            return False
-
-        # Validate ID format: XXXX-XXXX where X is a digit (0-9)
-        if not re.match(r'^\d{4}-\d{4}$', id_value):
-            return False
-
-        return True
-
-    def validate_name_format(self, name):
-        """Validate name format: Each part starts with an uppercase letter followed by lowercase letters."""
-        parts = name.split()
-        for part in parts:
-            if len(part) < 1 or not part[0].isupper() or not part[1:].islower():
-                return False
-        return True
-
-    def is_duplicate_id(self, id_value):
-        """Check if the ID already exists in the student database CSV file."""
-        with open(STUDENT_DATABASE, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if row[3] == id_value:  # Compare with ID field (assuming ID is in the second column)
-                    return True
-        return False
-
     def submit_data(self):
         """Submit student data."""
         id_value = self.id_edit.text()  # Get ID from QLineEdit widget
@@ -112,38 +68,33 @@ class AddStudentDialog(QDialog):
         # Prepare student data in the correct order for CSV writing
         student_data = [first_name, middle_initial, last_name, id_value, year_level, gender, course_code]
 
-        # Validate student data
-        if self.validate_student_data(student_data):
-            # Check if ID is already used
-            if self.is_duplicate_id(id_value):
-                QMessageBox.warning(self, "Error", "ID already exists. Please enter a unique ID.")
-                return
-
-            try:
-                # Append student data to the CSV file
-                with open(STUDENT_DATABASE, "a", newline='', encoding="utf-8") as f:
-                    writer = csv.writer(f)
-                    writer.writerow(student_data)
+        try:
+            # Validate student data and append it to the student database
+            add_student(self.student_store, self.course_store, student_data)
+        except ValidationError as e:
+            QMessageBox.warning(self, "Error", "Please enter valid data.\n" + str(e))
+            return
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Error occurred: {str(e)}")
+            return
 
-                QMessageBox.information(self, "Success", "Student added successfully.")
+        QMessageBox.information(self, "Success", "Student added successfully.")
 
-                # Restore the scroll position after closing the dialog
-                if self.parent() and hasattr(self.parent(), 'student_table'):
-                    self.parent().student_table.verticalScrollBar().setValue(self.original_scroll_position)
+        # Restore the scroll position after closing the dialog
+        if self.parent() and hasattr(self.parent(), 'student_table'):
+            self.parent().student_table.verticalScrollBar().setValue(self.original_scroll_position)
 
-                self.accept()  # Close the dialog
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Error occurred: {str(e)}")
-        else:
-            QMessageBox.warning(self, "Error", "Please enter valid data.")
+        self.accept()  # Close the dialog
 
 
 class AddCourseDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, course_store=None):
         super().__init__(parent)
         self.setWindowTitle("Add Course")
         self.setGeometry(200, 200, 400, 200)
 
+        self.course_store = course_store
+
         layout = QVBoxLayout()
         self.setLayout(layout)
 
@@ -163,52 +114,31 @@ class AddCourseDialog(QDialog):
         """Submit course data."""
         course_data = [field.text() for field in self.fields]
 
-        # Validate course data
-        if self.validate_course_data(course_data):
-            with open(COURSE_DATABASE, "a", newline='', encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(course_data)
-            QMessageBox.information(self, "Success", "Course added successfully.")
-            if self.parent():
-                if hasattr(self.parent(), 'signal'):
-                    self.parent().signal.course_added.emit()  # Emit signal after adding a course
-            self.close()
-        else:
-            QMessageBox.warning(self, "Error", "Please enter valid data.")
-
-    def validate_course_data(self, course_data):
-        """Validate course data."""
-        course_code = course_data[0]  # Course code is the first element of course_data
-        course_name = course_data[1]  # Course name is the second element of course_data
-        
-        if not course_code.isupper():
-                    QMessageBox.warning(self, "Error", "Course code must be all capital letters.")
-                    return False
-        
-        # Check if either the course code or the course name already exists in the database
-        with open(COURSE_DATABASE, "r", newline='', encoding="utf-8") as f:
-            reader = csv.reader(f)
-            for row in reader:
-                if row[0] == course_code:  # Compare with course code
-                    QMessageBox.warning(self, "Error", "Course code already exists. Please enter a unique course code.")
-                    return False
-                if row[1] == course_name:  # Compare with course name
-                    QMessageBox.warning(self, "Error", "Course name already exists. Please enter a unique course name.")
-                    return False
-
-        # If neither course code nor course name is a duplicate, return True
-        return True
+        try:
+            # Neither the course code nor the course name may already exist in the database
+            add_course(self.course_store, course_data)
+        except ValidationError as e:
+            QMessageBox.warning(self, "Error", "Please enter valid data.\n" + str(e))
+            return
+
+        QMessageBox.information(self, "Success", "Course added successfully.")
+        if self.parent():
+            if hasattr(self.parent(), 'signal'):
+                self.parent().signal.course_added.emit()  # Emit signal after adding a course
+        self.close()
 
 
 
 class UpdateStudentDialog(QDialog):
-    def __init__(self, parent=None, row=None, course_data=None):
+    def __init__(self, parent=None, id_value=None, course_data=None, student_store=None, course_store=None):
         super().__init__(parent)
         self.setWindowTitle("Update Student")
         self.setGeometry(200, 200, 400, 350)
 
-        self.row = row
+        self.id_value = id_value
         self.course_data = course_data
+        self.student_store = student_store
+        self.course_store = course_store  # The chosen course must still exist
         self.original_scroll_position = None  # Variable to store the scroll position
 
         layout = QVBoxLayout(self)
@@ -234,9 +164,9 @@ class UpdateStudentDialog(QDialog):
             label = QLabel(field)
             combo_box = QComboBox()
             if field == "Year Level":
-                combo_box.addItems(['1', '2', '3', '4'])  # Restrict options to 1, 2, 3, 4
+                combo_box.addItems(YEAR_LEVELS)  # Restrict options to 1, 2, 3, 4
             elif field == "Gender":
-                combo_box.addItems(['Male', 'Female'])  # Restrict options to Male and Female
+                combo_box.addItems(GENDERS)  # Restrict options to Male and Female
             elif field == "Course Code":
                 combo_box.addItem('None')
                 for course_code in self.course_data:
@@ -258,15 +188,10 @@ class UpdateStudentDialog(QDialog):
 
     def populate_fields(self):
         """Populate dialog fields with existing student data."""
-        if self.row is not None:
-            # Get data from the main window's student table
-            first_name = self.parent().student_table.item(self.row, 0).text()  # First Name
-            middle_initial = self.parent().student_table.item(self.row, 1).text()  # Middle Initial
-            last_name = self.parent().student_table.item(self.row, 2).text()  # Last Name
-            id_value = self.parent().student_table.item(self.row, 3).text()  # ID
-            year_level = self.parent().student_table.item(self.row, 4).text()  # Year Level
-            gender = self.parent().student_table.item(self.row, 5).text()  # Gender
-            course_code = self.parent().student_table.item(self.row, 6).text()  # Course Code
+        student = self.student_store.get(self.id_value) if self.id_value is not None else None
+        if student is not None:
+            # Get data from the student database
+            first_name, middle_initial, last_name, id_value, year_level, gender, course_code = student
 
             # Populate the dialog fields
             self.first_name_edit.setText(first_name)
@@ -289,38 +214,6 @@ class UpdateStudentDialog(QDialog):
             if course_index != -1:
                 self.fields[2].setCurrentIndex(course_index)
 
-    def validate_student_data(self, student_data):
-        """Validate updated student data."""
-        first_name, middle_initial, last_name, id_value, year_level, gender, course_code = student_data
-
-        # Check if required fields are not empty
-        if not first_name or not middle_initial or not last_name:
-            return False
-
-        # Validate first name format
-        if not self.validate_name_format(first_name):
-            return False
-
-        # Validate last name format
-        if not self.validate_name_format(last_name):
-            return False
-
-        # Validate middle initial format: One uppercase letter followed by a period
-        if len(middle_initial) != 2 or not middle_initial[0].isupper() or middle_initial[1] != '.':
-            return False
-
-        # Add more validation rules as needed...
-
-        return True
-
-    def validate_name_format(self, name):
-        """Validate name format: Each part starts with an uppercase letter followed by lowercase letters."""
-        parts = name.split()
-        for part in parts:
-            if len(part) < 1 or not part[0].isupper() or not part[1:].islower():
-                return False
-        return True
-
     def submit_data(self):
         """Submit updated student data."""
         id_value = self.id_edit.text()  # Get ID from QLineEdit widget
@@ -334,48 +227,36 @@ class UpdateStudentDialog(QDialog):
         # Prepare updated student data in the correct order for CSV writing
         updated_student_data = [first_name, middle_initial, last_name, id_value, year_level, gender, course_code]
 
-        # Validate all updated student data
-        if self.validate_student_data(updated_student_data):
-            try:
-                # Update student data in the CSV file
-                with open(STUDENT_DATABASE, "r", newline='', encoding="utf-8") as f:
-                    reader = csv.reader(f)
-                    data = list(reader)
-
-                # Find the row index of the existing student data
-                row_index = None
-                for i, row in enumerate(data):
-                    if row[3] == id_value:  # Compare by ID
-                        row_index = i
-                        break
-
-                if row_index is not None:
-                    data[row_index] = updated_student_data  # Update the data
-
-                    with open(STUDENT_DATABASE, "w", newline='', encoding="utf-8") as f:
-                        writer = csv.writer(f)
-                        writer.writerows(data)
-
-                    QMessageBox.information(self, "Success", "Student updated successfully.")
-                    self.accept()  # Close the dialog after successful update
-
-                    # Restore the scroll position after closing the dialog
-                    if self.parent() and hasattr(self.parent(), 'student_table'):
-                        self.parent().student_table.verticalScrollBar().setValue(self.original_scroll_position)
-                else:
-                    QMessageBox.warning(self, "Error", "Student not found in the database.")
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"Error occurred: {str(e)}")
-        else:
-            QMessageBox.warning(self, "Error", "Please enter valid data.")
+        try:
+            # Validate all updated student data and update the existing student by ID
+            update_student(self.student_store, self.course_store, id_value, updated_student_data)
+        except ValidationError as e:
+            QMessageBox.warning(self, "Error", "Please enter valid data.\n" + str(e))
+            return
+        except KeyError:
+            QMessageBox.warning(self, "Error", "Student not found in the database.")
+            return
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Error occurred: {str(e)}")
+            return
+
+        QMessageBox.information(self, "Success", "Student updated successfully.")
+        self.accept()  # Close the dialog after successful update
+
+        # Restore the scroll position after closing the dialog
+        if self.parent() and hasattr(self.parent(), 'student_table'):
+            self.parent().student_table.verticalScrollBar().setValue(self.original_scroll_position)
 
 class UpdateCourseDialog(QDialog):
-    def __init__(self, parent=None, row=None):
+    def __init__(self, parent=None, course_code=None, course_store=None, student_store=None):
         super().__init__(parent)
         self.setWindowTitle("Update Course")
         self.setGeometry(200, 200, 400, 200)
 
-        self.row = row
+        self.course_code = course_code
+        self.course_store = course_store
+        self.student_store = student_store  # Students follow a renamed course
+        course = self.course_store.get(course_code)
 
         layout = QVBoxLayout()
         self.setLayout(layout)
@@ -387,7 +268,7 @@ class UpdateCourseDialog(QDialog):
             layout.addWidget(label)
             layout.addWidget(edit)
             self.fields.append(edit)
-            edit.setText(parent.student_table.item(self.row, i).text())
+            edit.setText(course[i])
 
         self.submit_button = QPushButton("Submit")
         layout.addWidget(self.submit_button)
@@ -397,48 +278,12 @@ class UpdateCourseDialog(QDialog):
         """Submit updated course data."""
         updated_data = [field.text() for field in self.fields]
 
-        # Validate updated data
-        if self.validate_course_data(updated_data):
-            # Load existing course data
-            with open(COURSE_DATABASE, "r", newline='', encoding="utf-8") as f:
-                reader = csv.reader(f)
-                data = list(reader)
-
-            # Update data for the specific row
-            data[self.row + 1] = updated_data  # Adjust row index to account for header row
-
-            # Write updated data back to CSV file
-            with open(COURSE_DATABASE, "w", newline='', encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerows(data)
-
-            QMessageBox.information(self, "Success", "Course updated successfully.")
-            self.parent().load_course_data()  # Reload data in main window
-            self.close()
-        else:
-            QMessageBox.warning(self, "Error", "Please enter valid data.")
-
-    def validate_course_data(self, course_data):
-        """Validate updated course data."""
-        updated_course_code = course_data[0]  # Updated course code
-        updated_course_name = course_data[1]  # Updated course name
-        
-        if not updated_course_code.isupper():
-                    QMessageBox.warning(self, "Error", "Course code must be all capital letters.")
-                    return False
-        
-        # Load existing course data
-        with open(COURSE_DATABASE, "r", newline='', encoding="utf-8") as f:
-            reader = csv.reader(f)
-            for row_index, row in enumerate(reader):
-                if row_index == self.row:  # Skip the current row being updated
-                    continue
-                if row[0] == updated_course_code:  # Compare with course code
-                    QMessageBox.warning(self, "Error", "Course code already exists. Please enter a unique course code.")
-                    return False
-                if row[1] == updated_course_name:  # Compare with course name
-                    QMessageBox.warning(self, "Error", "Course name already exists. Please enter a unique course name.")
-                    return False
-
-        # If neither course code nor course name is a duplicate, return True
-        return True
\ No newline at end of file
+        try:
+            # Validate updated data and update the specific course (and its students, if renamed)
+            update_course(self.student_store, self.course_store, self.course_code, updated_data)
+        except ValidationError as e:
+            QMessageBox.warning(self, "Error", "Please enter valid data.\n" + str(e))
+            return
+
+        QMessageBox.information(self, "Success", "Course updated successfully.")
+        self.close()
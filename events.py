@@ -0,0 +1,16 @@
+# Row-level change events sent to store listeners as (change, key, row)
+INSERTED = 'inserted'
+CHANGED = 'changed'  # key is the row's key before the change
+REMOVED = 'removed'
+
+
+class ChangeNotifier:
+    """Sends row-level change events to subscribed listeners."""
+
+    def subscribe(self, listener):
+        """Call listener(change, key, row) after every add, update and delete."""
+        self.listeners.append(listener)
+
+    def _notify(self, change, key, row=None):
+        for listener in self.listeners:
+            listener(change, key, row)
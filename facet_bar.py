@@ -0,0 +1,83 @@
+from PyQt5.QtWidgets import QHBoxLayout, QLabel, QMenu, QToolButton, QWidget
+from PyQt5.QtCore import QTimer, pyqtSignal
+
+
+class FacetBar(QWidget):
+    """One drop-down per facet with a checkable entry and live count per value.
+
+    Change events only schedule a refresh, so a cascade touching thousands of
+    rows updates the menus once; a refresh just retitles the entries whose
+    count changed, and rebuilds a menu only when its values came or went.
+    """
+
+    selection_changed = pyqtSignal()
+
+    def __init__(self, facet_index, parent=None):
+        super().__init__(parent)
+        self.facet_index = facet_index
+        self.selected = {facet: set() for facet in facet_index.facets}
+        self.buttons = {}
+        self.actions = {facet: {} for facet in facet_index.facets}  # facet -> value -> menu entry
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(0)  # Once the events of the current change are all in
+        self.refresh_timer.timeout.connect(self.update_menus)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(QLabel("Filter:"))
+        for facet in facet_index.facets:
+            button = QToolButton()
+            button.setPopupMode(QToolButton.InstantPopup)
+            button.setMenu(QMenu(button))
+            button.setText(facet)
+            layout.addWidget(button)
+            self.buttons[facet] = button
+        layout.addStretch()
+        self.update_menus()
+
+    def selection(self):
+        """Return {facet: set of chosen values}."""
+        return {facet: set(values) for facet, values in self.selected.items()}
+
+    def is_active(self):
+        """Check if any facet value is chosen."""
+        return any(self.selected.values())
+
+    def refresh_counts(self, *change):
+        """Update the menus from the index's counts once the current change is over."""
+        self.refresh_timer.start()
+
+    def update_menus(self):
+        """Bring the menus in line with the index's current counts."""
+        for facet, button in self.buttons.items():
+            counts = self.facet_index.facet_counts(facet)
+            actions = self.actions[facet]
+            if counts.keys() != actions.keys():
+                self._rebuild_menu(facet, button.menu(), counts)
+                continue
+            for value, count in counts.items():
+                text = f"{value} ({count})"
+                if actions[value].text() != text:
+                    actions[value].setText(text)
+
+    def _rebuild_menu(self, facet, menu, counts):
+        menu.clear()
+        actions = self.actions[facet] = {}
+        for value, count in counts.items():
+            action = actions[value] = menu.addAction(f"{value} ({count})")
+            action.setCheckable(True)
+            action.setChecked(value in self.selected[facet])
+            action.toggled.connect(lambda checked, facet=facet, value=value: self.toggle_value(facet, value, checked))
+        chosen = len(self.selected[facet])
+        self.buttons[facet].setText(f"{facet} ({chosen})" if chosen else facet)
+
+    def toggle_value(self, facet, value, checked):
+        """Add or remove one value from the selection."""
+        if checked:
+            self.selected[facet].add(value)
+        else:
+            self.selected[facet].discard(value)
+        chosen = len(self.selected[facet])
+        self.buttons[facet].setText(f"{facet} ({chosen})" if chosen else facet)
+        self.selection_changed.emit()
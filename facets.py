@@ -0,0 +1,142 @@
+from events import INSERTED, CHANGED, REMOVED
+
+
+def student_status(row):
+    """Return 'Enrolled' or 'Unenrolled' based on the student's course."""
+    return "Enrolled" if row[6].strip().lower() != "none" else "Unenrolled"
+
+
+# Low-cardinality student columns offered as facet filters
+STUDENT_FACETS = {
+    'Year Level': lambda row: row[4],
+    'Gender': lambda row: row[5],
+    'Course Code': lambda row: row[6],
+    'Status': student_status,
+}
+
+
+def _set_bit(bits, slot):
+    byte = slot >> 3
+    if byte >= len(bits):
+        bits.extend(bytes(max(byte + 1, 2 * len(bits)) - len(bits)))
+    bits[byte] |= 1 << (slot & 7)
+
+
+def _clear_bit(bits, slot):
+    bits[slot >> 3] &= ~(1 << (slot & 7)) & 0xFF
+
+
+def _as_int(bits):
+    return int.from_bytes(bits, 'little')
+
+
+class FacetIndex:
+    """Bitmap index over a few low-cardinality columns, with per-value counts.
+
+    Every row gets a slot number in store order; slots are never reused, so
+    walking the set bits of a bitmap yields rows in store order. Each facet
+    value keeps a bitmap of the slots holding it. A selection ORs the bitmaps
+    of the chosen values within a facet and ANDs the facets together. Counts
+    are adjusted on every change event rather than recounted.
+    """
+
+    def __init__(self, key_index, facets=STUDENT_FACETS):
+        self.key_index = key_index
+        self.facets = facets
+        self.clear()
+
+    def clear(self):
+        self.slots = {}  # key -> slot
+        self.keys = []  # slot -> key (None once removed)
+        self.values = {}  # key -> facet values of the row, in self.facets order
+        self.live = bytearray()  # slots still in use
+        self.bitmaps = {facet: {} for facet in self.facets}  # facet -> value -> bitmap
+        self.counts = {facet: {} for facet in self.facets}  # facet -> value -> number of rows
+
+    def build(self, rows):
+        """Index every row, in store order."""
+        self.clear()
+        for row in rows:
+            self._add(row[self.key_index], row)
+
+    def state(self):
+        """Return the contents of the index, for restore()."""
+        return self.slots, self.keys, self.values, self.live, self.bitmaps, self.counts
+
+    def restore(self, state):
+        """Replace the contents of the index with a state() of an index over the same facets."""
+        self.slots, self.keys, self.values, self.live, self.bitmaps, self.counts = state
+
+    def _add(self, key, row, slot=None):
+        if slot is None:
+            slot = len(self.keys)
+            self.keys.append(key)
+            _set_bit(self.live, slot)
+        else:
+            self.keys[slot] = key
+        self.slots[key] = slot
+        values = tuple(value_of(row) for value_of in self.facets.values())
+        self.values[key] = values
+        for facet, value in zip(self.facets, values):
+            _set_bit(self.bitmaps[facet].setdefault(value, bytearray()), slot)
+            self.counts[facet][value] = self.counts[facet].get(value, 0) + 1
+
+    def _remove(self, key):
+        slot = self.slots.pop(key)
+        for facet, value in zip(self.facets, self.values.pop(key)):
+            _clear_bit(self.bitmaps[facet][value], slot)
+            self.counts[facet][value] -= 1
+            if not self.counts[facet][value]:
+                del self.counts[facet][value]
+                del self.bitmaps[facet][value]
+        return slot
+
+    def apply_change(self, change, key, row):
+        """Update the bitmaps and counts for one store change event."""
+        if change == INSERTED:
+            self._add(key, row)
+        elif change == CHANGED:
+            # The row keeps its slot, and so its place in store order
+            self._add(row[self.key_index], row, self._remove(key))
+        elif change == REMOVED:
+            slot = self._remove(key)
+            self.keys[slot] = None
+            _clear_bit(self.live, slot)
+
+    def facet_counts(self, facet):
+        """Return {value: number of rows} for a facet, sorted by value."""
+        return dict(sorted(self.counts[facet].items()))
+
+    def select(self, selection):
+        """Return the keys of rows matching a selection, in store order.
+
+        selection maps facets to the set of values to keep; facets that are
+        missing or have an empty set don't filter.
+        """
+        result = _as_int(self.live)
+        for facet, values in selection.items():
+            if not values:
+                continue
+            chosen = 0
+            for value in values:
+                bitmap = self.bitmaps[facet].get(value)
+                if bitmap is not None:
+                    chosen |= _as_int(bitmap)
+            result &= chosen
+        return self._keys_of(result)
+
+    def _keys_of(self, bitmap):
+        keys = []
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+        for byte_index, byte in enumerate(data):
+            while byte:
+                low_bit = byte & -byte
+                keys.append(self.keys[(byte_index << 3) + low_bit.bit_length() - 1])
+                byte ^= low_bit
+        return keys
+
+    def accepts(self, selection):
+        """Return a predicate telling if a row matches a selection."""
+        active = [(value_of, values) for facet, value_of in self.facets.items()
+                  if (values := selection.get(facet))]
+        return lambda row: all(value_of(row) in values for value_of, values in active)
@@ -0,0 +1,132 @@
+import os
+import stat
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# How often a blocking acquire retries where the OS lock call cannot wait (Windows)
+POLL_SECONDS = 0.05
+
+# The process umask, read once at import: os.umask() can only read it by changing it, which other threads would see
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class FileLock:
+    """An exclusive advisory lock on a lock file, shared by every process that opens it.
+
+    Used as a context manager, or through acquire(blocking) and release().
+    The lock is reentrant and also keeps other threads of this process out.
+    It is advisory: only code that takes it is kept out. The lock file is
+    created on first use and left in place, since deleting it would race with
+    other processes opening it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._file = None
+        self._depth = 0
+
+    def acquire(self, blocking=True):
+        """Take the lock, waiting for other processes unless blocking is False; return whether it was taken."""
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if self._depth == 0:
+            try:
+                f = open(self.path, "a+b")
+            except OSError:
+                self._thread_lock.release()
+                raise
+            try:
+                locked = _lock(f, blocking)
+            except BaseException:
+                f.close()
+                self._thread_lock.release()
+                raise
+            if not locked:
+                f.close()
+                self._thread_lock.release()
+                return False
+            self._file = f
+        self._depth += 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                _unlock(self._file)
+            finally:
+                self._file.close()  # Closing the file drops the lock in any case
+                self._file = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
+
+
+def _lock(f, blocking):
+    if fcntl is not None:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return False
+        return True
+    while True:
+        f.seek(0)
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+        time.sleep(POLL_SECONDS)
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def fsync_directory(path):
+    """Flush the directory entry of path to disk, where the OS allows it (not on Windows)."""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def keep_mode(fd, path):
+    """Give the open temporary file fd the permissions of path, which it is about to replace.
+
+    mkstemp() makes files only their owner can read, and renaming one over a
+    shared CSV would lock every other workstation out of it. A file that
+    doesn't exist yet gets the usual permissions for a new file (the umask's).
+    """
+    if not hasattr(os, 'fchmod'):
+        return  # Windows: no permission bits to keep
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o666 & ~_UMASK
+    os.fchmod(fd, mode)
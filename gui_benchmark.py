@@ -0,0 +1,237 @@
+"""End-to-end GUI latency benchmarks, run under the offscreen Qt platform.
+
+    python gui_benchmark.py                              # 1k, 10k and 100k students
+    python gui_benchmark.py --sizes 100000 --output gui.json --compare old.json
+
+Drives a real StudentManagementApp over a generated roster: startup, table
+reload and column resizing, switching views, sorting, searches (plain and as
+you type) and a round-trip through each dialog, from opening it to the table
+showing the change. Message boxes are answered automatically. Each size runs
+in its own process so that its peak RSS is its own. Results use the same JSON
+format as benchmark.py.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+try:
+    import resource
+except ImportError:  # Unix only
+    resource = None
+
+from benchmark import DEFAULT_COURSES, compare, environment
+from roster_generator import write_roster, student_id
+from snapshot import snapshot_path
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+WAIT_TIMEOUT = 60  # seconds to wait for a live search to deliver
+
+
+def peak_rss_kb():
+    """Return the peak resident set size of this process in KiB, if known."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # macOS reports bytes
+
+
+class GuiBenchmark:
+    """Times steps that drive the window, draining the event queue after each."""
+
+    def __init__(self, app, size, backend):
+        self.app = app
+        self.size = size
+        self.backend = backend
+        self.results = []
+        self.warnings = []
+
+    def settle(self):
+        """Process events until Qt has nothing left to do."""
+        self.app.sendPostedEvents()
+        self.app.processEvents()
+
+    def wait_for(self, condition):
+        """Process events until condition() holds."""
+        from PyQt5.QtCore import QEventLoop
+        deadline = time.perf_counter() + WAIT_TIMEOUT
+        while not condition():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("Timed out waiting for the window.")
+            self.app.processEvents(QEventLoop.AllEvents, 5)
+        self.settle()
+
+    def step(self, name, run):
+        """Time run() plus the events it leaves behind; return run()'s result."""
+        del self.warnings[:]
+        start = time.perf_counter()
+        value = run()
+        self.settle()
+        elapsed = time.perf_counter() - start
+        if self.warnings:
+            raise RuntimeError(f"{name} showed a warning: {self.warnings[0]}")
+        self.results.append({'name': name, 'size': self.size, 'backend': self.backend, 'ops': 1,
+                             'best': elapsed, 'median': elapsed, 'per_op': elapsed, 'peak_rss_kb': peak_rss_kb()})
+        print(f"{self.backend:6} {self.size:>8} {name:28} {elapsed * 1000:10.2f} ms  (peak RSS {peak_rss_kb()} KiB)")
+        return value
+
+
+def answer_message_boxes(bench):
+    """Make message boxes return at once: information and question boxes say Yes, warnings are recorded."""
+    from PyQt5.QtWidgets import QMessageBox
+    QMessageBox.information = lambda *args, **kwargs: QMessageBox.Ok
+    QMessageBox.question = lambda *args, **kwargs: QMessageBox.Yes
+    QMessageBox.warning = lambda parent, title, text, *args, **kwargs: bench.warnings.append(text) or QMessageBox.Ok
+
+
+def run_size(size, num_courses, seed, backend):
+    """Run every GUI benchmark on one generated roster, in this process."""
+    from PyQt5.QtWidgets import QApplication
+    from dialogs import AddStudentDialog, UpdateStudentDialog, AddCourseDialog, UpdateCourseDialog
+    from main import StudentManagementApp
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    bench = GuiBenchmark(app, size, backend)
+    answer_message_boxes(bench)
+
+    work_dir = tempfile.mkdtemp(prefix='gui-bench-')
+    previous_dir = os.getcwd()
+    try:
+        write_roster(work_dir, size, num_courses, seed)
+        os.chdir(work_dir)  # The window opens students.csv and courses.csv in the working directory
+        os.environ['STUDENT_DB_BACKEND'] = backend
+
+        def startup():
+            window = StudentManagementApp()
+            window.show()
+            return window
+        window = bench.step('startup', startup)
+
+        bench.step('reload_students', window.load_student_data)
+        bench.step('resize_columns', window.student_table.resizeColumnsToContents)
+        bench.step('toggle_to_courses', lambda: window.toggle_button.setChecked(True))
+        bench.step('toggle_to_students', lambda: window.toggle_button.setChecked(False))
+        bench.step('sort_last_name', lambda: window.sort_by_column(2))
+        bench.step('sort_last_name_reversed', lambda: window.sort_by_column(2))
+
+        # Searches started with the Search button
+        sample = window.students.get(student_id(size // 2))
+        window.live_search_check.setChecked(False)
+        for criteria, query in [('Last Name', sample[2][:3]), ('ID', sample[3][-5:]), ('Course Code', sample[6]),
+                                ('Query', f"last:{sample[2]} year:{sample[4]}")]:
+            window.search_criteria_combo.setCurrentText(criteria)
+            window.search_line_edit.setText(query)
+            bench.step(f'search[{criteria}]', window.search_students)
+        window.search_line_edit.setText('')
+        bench.step('search_cleared', window.search_students)
+
+        # Search as you type: from the keystroke until the results are on screen
+        window.live_search_check.setChecked(True)
+        window.search_criteria_combo.setCurrentText('Last Name')
+        bench.settle()
+        delivered = []
+        window.live_search.results_ready.connect(lambda *result: delivered.append(result))
+
+        def live_search():
+            window.search_line_edit.setText(sample[2][:3])
+            bench.wait_for(lambda: delivered)
+        bench.step('live_search', live_search)
+        window.search_line_edit.setText('')
+        bench.settle()
+
+        # Dialog round-trips, from opening the dialog to the table showing the change
+        new_id = student_id(size)
+        course_code = sample[6] if sample[6] != 'None' else window.courses.keys()[0]
+
+        def add_student():
+            dialog = AddStudentDialog(window, window.course_data, window.students, window.courses)
+            dialog.first_name_edit.setText('Benchmark')
+            dialog.middle_initial_edit.setText('B.')
+            dialog.last_name_edit.setText('Student')
+            dialog.id_edit.setText(new_id)
+            dialog.course_combo.setCurrentText(course_code)
+            dialog.submit_data()
+        bench.step('dialog_add_student', add_student)
+
+        def update_student():
+            dialog = UpdateStudentDialog(window, new_id, window.course_data, window.students, window.courses)
+            dialog.fields[0].setCurrentText('2')  # Year Level
+            dialog.submit_data()
+        bench.step('dialog_update_student', update_student)
+        bench.step('delete_student', lambda: window.confirm_delete_student(new_id))
+
+        def add_course():
+            dialog = AddCourseDialog(window, window.courses)
+            dialog.fields[0].setText('BSBENCH')
+            dialog.fields[1].setText('BS Benchmarking')
+            dialog.submit_data()
+        bench.step('dialog_add_course', add_course)
+
+        def rename_course():
+            # Renaming a course moves all of its students
+            dialog = UpdateCourseDialog(window, course_code, window.courses, window.students)
+            dialog.fields[0].setText(course_code + 'X')
+            dialog.submit_data()
+        bench.step('dialog_rename_course', rename_course)
+        bench.step('delete_course', lambda: window.confirm_delete_course(course_code + 'X'))
+
+        window.close()  # Folds the journals back into the CSV files
+    finally:
+        os.chdir(previous_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        for name in ('students.csv', 'courses.csv'):
+            try:
+                # Kept outside work_dir, under the path the window saw from inside it
+                os.remove(snapshot_path(os.path.join(os.path.realpath(work_dir), name)))
+            except FileNotFoundError:
+                pass
+    return bench.results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the GUI under the offscreen Qt platform.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="numbers of students")
+    parser.add_argument('--courses', type=int, default=DEFAULT_COURSES, help="number of courses")
+    parser.add_argument('--backend', choices=['csv', 'sqlite'], default='csv')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='gui_benchmark_results.json')
+    parser.add_argument('--compare', help="previous results file to compare against")
+    args = parser.parse_args(argv)
+    output_path = os.path.abspath(args.output)
+    compare_path = args.compare and os.path.abspath(args.compare)
+
+    if len(args.sizes) == 1:
+        results = run_size(args.sizes[0], args.courses, args.seed, args.backend)
+    else:
+        # One process per size, so each peak RSS belongs to that size alone
+        results = []
+        for size in args.sizes:
+            with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+                size_output = f.name
+            subprocess.run([sys.executable, os.path.abspath(__file__), '--sizes', str(size),
+                            '--courses', str(args.courses), '--backend', args.backend, '--seed', str(args.seed),
+                            '--output', size_output], check=True)
+            with open(size_output, "r", encoding="utf-8") as f:
+                results.extend(json.load(f)['results'])
+            os.remove(size_output)
+
+    output = {'environment': environment(),
+              'parameters': {'courses': args.courses, 'seed': args.seed, 'backend': args.backend},
+              'results': results}
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {output_path}")
+
+    if compare_path:
+        with open(compare_path, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Opt-in timing of file I/O, parsing, indexing, searches and table population.
+
+Set STUDENT_DB_TRACE to a file name to turn it on, e.g.
+
+    STUDENT_DB_TRACE=trace.json python main.py
+
+Spans are kept in memory and written as a Chrome trace (open it in
+chrome://tracing or https://ui.perfetto.dev) when the program exits, or
+earlier with dump(). When the variable is not set, span() hands back one
+shared do-nothing object and count() returns at once, so the calls can stay
+in place.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+
+TRACE_ENV = 'STUDENT_DB_TRACE'
+
+# Spans shown in the rolling summary
+RECENT_SPANS = 5
+
+trace_path = os.environ.get(TRACE_ENV) or None
+enabled = trace_path is not None
+
+_events = []  # Chrome trace events, in the order the spans ended
+_recent = deque(maxlen=RECENT_SPANS)  # (name, milliseconds, args) of the latest spans
+_counters = {}  # name -> running total
+_origin = time.perf_counter()
+
+
+class Span:
+    """Times a with block and records it as a complete trace event."""
+
+    __slots__ = ('name', 'category', 'args', 'start')
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = 0.0
+
+    def set(self, **args):
+        """Attach more arguments (row counts, ...) to the span."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        _events.append({'name': self.name, 'cat': self.category, 'ph': 'X', 'pid': os.getpid(),
+                        'tid': threading.get_ident(), 'ts': (self.start - _origin) * 1e6,
+                        'dur': (end - self.start) * 1e6, 'args': self.args})
+        _recent.append((self.name, (end - self.start) * 1000, self.args))
+        return False
+
+
+class _NullSpan:
+    """Stands in for Span when instrumentation is off."""
+
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(name, category='app', **args):
+    """Return a context manager timing its block as name."""
+    if not enabled:
+        return NULL_SPAN
+    return Span(name, category, args)
+
+
+def count(name, amount=1):
+    """Add amount to the counter name."""
+    if not enabled:
+        return
+    total = _counters[name] = _counters.get(name, 0) + amount
+    _events.append({'name': name, 'ph': 'C', 'pid': os.getpid(), 'ts': (time.perf_counter() - _origin) * 1e6,
+                    'args': {name: total}})
+
+
+def summary():
+    """Return a one-line summary of the latest spans and the counters."""
+    parts = []
+    for name, milliseconds, args in list(_recent):
+        rows = args.get('rows')
+        parts.append(f"{name} {milliseconds:.1f} ms" + (f" ({rows} rows)" if rows is not None else ""))
+    parts.extend(f"{name}: {total}" for name, total in sorted(_counters.items()))
+    return " | ".join(parts)
+
+
+def dump(path=None):
+    """Write every recorded span and counter to a Chrome trace file; return its path."""
+    path = path or trace_path
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({'traceEvents': list(_events), 'displayTimeUnit': 'ms',
+                   'otherData': {'counters': dict(_counters)}}, f)
+    return path
+
+
+if enabled:
+    atexit.register(dump)
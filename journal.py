@@ -0,0 +1,289 @@
+import csv
+import io
+import os
+import threading
+from file_lock import fsync_directory
+from instrumentation import span
+
+# Journal operations
+ADD = 'A'
+UPDATE = 'U'
+DELETE = 'D'
+OPERATIONS = (ADD, UPDATE, DELETE)
+
+# Bytes read at a time when looking back for the end of the last whole record
+TAIL_BLOCK = 64 * 1024
+
+
+class Journal:
+    """Append-only log of row changes kept next to a CSV file.
+
+    Each line is a CSV record: the operation, the key it applies to and, for
+    adds and updates, the new row. Several processes may append to the same
+    log: every append is made while holding lock (the store's FileLock) and
+    is synced to disk before the lock is let go. The journal remembers how far
+    its owner has read the log, so read_new() returns just the records
+    appended since then, by this process or any other.
+    """
+
+    def __init__(self, base_path, lock):
+        self.path = base_path + '.journal'
+        self.lock = lock
+        self.entries = 0  # records in the live log
+        self.inode = None  # inode of the live log the owner has read, None if there was none
+        self.offset = 0  # bytes of it the owner has read
+
+    def append(self, op, key, row=()):
+        """Append one change and sync it to disk."""
+        self.append_many([(op, key, row)])
+
+    def append_many(self, records):
+        """Append several (op, key, row) changes with a single sync."""
+        self._write(records)
+        self.entries += len(records)
+
+    def _write(self, records):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([op, key, *row] for op, key, row in records)
+        data = buffer.getvalue().encode("utf-8")
+        with span('journal.append', 'io', path=self.path, rows=len(records)), self.lock, open(self.path, "a+b") as f:
+            start = os.fstat(f.fileno()).st_size
+            if start:
+                end = _last_line_end(f, start)
+                if end != start:
+                    # A crashed writer left half a record; ending it with a line break would make it replay
+                    f.truncate(end)
+                    start = end
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            if not start:
+                fsync_directory(self.path)
+            inode = os.fstat(f.fileno()).st_ino
+            if start == self.offset and self.inode in (None, inode):
+                # Nobody else appended since the owner last read; it need not read its own records back
+                self.inode = inode
+                self.offset = start + len(data)
+
+    def _read(self, path, start=0, end=None):
+        """Return the records of the whole lines in path between start and end, the file's inode and where they end."""
+        with open(path, "rb") as f:
+            return self._read_file(f, start, end)
+
+    def _read_file(self, f, start=0, end=None):
+        """Like _read(), from an open file."""
+        inode = os.fstat(f.fileno()).st_ino
+        f.seek(start)
+        data = f.read() if end is None else f.read(end - start)
+        end = start + data.rfind(b"\n") + 1  # A half-written last line is left for later
+        records = [(record[0], record[1], record[2:])
+                   for record in csv.reader(io.StringIO(data[:end - start].decode("utf-8")))
+                   if len(record) >= 2 and record[0] in OPERATIONS]
+        return records, inode, end
+
+    def open_log(self):
+        """Open the live log as it is now; return the open file (None if there is none) and its size.
+
+        Call with the lock held. The file can be read by replay() after the
+        lock is let go: appends made since are left out, and a compaction
+        swapping in a new log does not affect it.
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return None, 0
+        return f, os.fstat(f.fileno()).st_size
+
+    def replay(self, log):
+        """Return (op, key, row) for every change in log (as returned by open_log()), oldest first, and mark them read."""
+        f, end = log
+        if f is None:
+            records, self.inode, self.offset = [], None, 0
+        else:
+            records, self.inode, self.offset = self._read_file(f, 0, end)
+        self.entries = len(records)
+        return records
+
+    def read_new(self):
+        """Return the records appended since the owner last read the log.
+
+        Returns None if the log was replaced by another process's compaction
+        since then; the owner has to read the base file and the log again.
+        Call with the lock held.
+        """
+        inode, size = self.end()
+        if inode is None:
+            return [] if self.inode is None else None
+        if self.inode is not None and (inode != self.inode or size < self.offset):
+            return None
+        if inode == self.inode and size == self.offset:
+            return []
+        records, self.inode, self.offset = self._read(self.path, self.offset)
+        self.entries += len(records)
+        return records
+
+    def end(self):
+        """Return the inode and size of the live log (None, 0 if there is none). Call with the lock held."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None, 0
+        return stat.st_ino, stat.st_size
+
+    def read_until(self, inode, end):
+        """Return the records of the live log up to end, as returned by end()."""
+        if inode is None:
+            return []
+        records, live_inode, _ = self._read(self.path, 0, end)
+        if live_inode != inode:
+            raise RuntimeError(f"{self.path} was replaced during a compaction.")
+        return records
+
+    def drop_folded(self, inode, end):
+        """Drop the records a compaction folded into the base file: the live log up to end.
+
+        Records appended after end are kept. Call with the lock held, after
+        the base file is replaced. Return whether the owner had read the whole
+        folded part, i.e. whether its position is still good.
+        """
+        if inode is None:
+            return True
+        with open(self.path, "rb") as f:
+            f.seek(end)
+            rest = f.read()
+        if rest:
+            temp_path = self.path + '.tmp'
+            with open(temp_path, "wb") as f:
+                f.write(rest)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            new_inode = os.stat(self.path).st_ino
+        else:
+            os.remove(self.path)
+            new_inode = None
+        fsync_directory(self.path)
+        self.entries = rest.count(b"\n")
+        if self.inode != inode or self.offset < end:
+            return False
+        self.inode = new_inode
+        self.offset -= end
+        return True
+
+    def has_records(self):
+        """Check if the live log holds anything."""
+        return self.end()[1] > 0
+
+    def pending(self):
+        """Check if appended changes are still waiting to be written."""
+        return False
+
+    def flush(self):
+        """Appends are written at once; nothing to do."""
+
+    def close(self):
+        """Appends leave nothing open; nothing to do."""
+
+
+def _last_line_end(f, size):
+    """Return the offset just past the last line break in the first size bytes of an open file, or 0."""
+    end = size
+    while end > 0:
+        start = max(end - TAIL_BLOCK, 0)
+        f.seek(start)
+        found = f.read(end - start).rfind(b"\n")
+        if found != -1:
+            return start + found + 1
+        end = start
+    return 0
+
+
+class BackgroundJournal(Journal):
+    """A Journal whose appends are written by a worker thread.
+
+    append_many() only queues the records. The worker writes everything that
+    queued up while it was busy in one write and one sync, so a burst of
+    edits costs one trip to disk. Records are written in the order they were
+    appended. If a write fails, on_error(exception) is called from the worker
+    thread and the same records are retried every RETRY_SECONDS. Later
+    records wait behind them, so the order on disk never changes. A record
+    written twice by a retry after a partial write replays harmlessly.
+
+    Appends, flush() and close() must come from one thread (the GUI thread).
+    """
+
+    RETRY_SECONDS = 1.0
+
+    def __init__(self, base_path, lock, on_error=None):
+        super().__init__(base_path, lock)
+        self.on_error = on_error
+        self.error = None  # last write error, until a retry succeeds
+        self._failures = 0
+        self._pending = []
+        self._writing = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name=f"journal writer ({base_path})", daemon=True)
+        self._worker.start()
+
+    def append_many(self, records):
+        """Queue several (op, key, row) changes; they are written shortly after."""
+        with self._condition:
+            if self._closed:
+                # The user kept working after a close that failed elsewhere; with the worker gone, write directly
+                super().append_many(records)
+                return
+            self._pending.extend(records)
+            self.entries += len(records)
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return  # Closed and everything is written
+                batch = self._pending
+                self._pending = []
+                self._writing = True
+            try:
+                self._write(batch)
+            except OSError as e:
+                with self._condition:
+                    self._pending[:0] = batch  # Retry these first
+                    self._writing = False
+                    self.error = e
+                    self._failures += 1
+                    self._condition.notify_all()
+                if self.on_error is not None:
+                    self.on_error(e)
+                with self._condition:
+                    self._condition.wait(self.RETRY_SECONDS)
+                continue
+            with self._condition:
+                self._writing = False
+                self.error = None
+                self._condition.notify_all()
+
+    def flush(self):
+        """Wait until every queued change is on disk; raise the error if the next attempt fails."""
+        with self._condition:
+            failures = self._failures
+            self._condition.notify_all()  # A worker waiting to retry retries now
+            while self._pending or self._writing:
+                if self._failures > failures:
+                    raise self.error
+                self._condition.wait()
+
+    def pending(self):
+        with self._condition:
+            return bool(self._pending or self._writing)
+
+    def close(self):
+        """Write what is still queued, then stop the worker."""
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._worker.join()
@@ -0,0 +1,131 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from instrumentation import span
+from store import QUERY_CRITERIA
+
+# Milliseconds to wait after the last keystroke before searching
+DEBOUNCE_MS = 150
+
+# Rows checked between looks at the cancellation flag
+CANCEL_CHECK_INTERVAL = 1024
+
+
+def narrows(criteria, old_query, new_query):
+    """Check if every match for new_query is also a match for old_query."""
+    if criteria == QUERY_CRITERIA:
+        return False  # Extending a query can widen it (e.g. adding OR)
+    if criteria == 'Gender':
+        return new_query.startswith(old_query)  # Gender matches by prefix
+    return old_query in new_query
+
+
+class SearchSignals(QObject):
+    finished = pyqtSignal(int, str, str, list)  # generation, criteria, query, rows
+
+
+class SearchTask(QRunnable):
+    """One search run on the thread pool; stops early once cancelled."""
+
+    def __init__(self, store, generation, criteria, query, previous_rows=None):
+        super().__init__()
+        self.store = store
+        self.generation = generation
+        self.criteria = criteria
+        self.query = query
+        self.previous_rows = previous_rows
+        self.cancelled = False
+        self.signals = SearchSignals()
+
+    def run(self):
+        try:
+            with span('live_search', criteria=self.criteria, narrowed=self.previous_rows is not None) as timing:
+                if self.previous_rows is not None:
+                    # Narrow the previous results instead of searching the whole store
+                    rows = []
+                    for i, row in enumerate(self.previous_rows):
+                        if i % CANCEL_CHECK_INTERVAL == 0 and self.cancelled:
+                            return
+                        if self.store.matches(row, self.criteria, self.query):
+                            rows.append(row)
+                else:
+                    rows = self.store.search(self.criteria, self.query)
+                timing.set(rows=len(rows))
+        except (RuntimeError, KeyError):
+            # The store changed mid-search (an index or row set resized, or a found row deleted);
+            # the change event that follows makes LiveSearch queue a fresh search
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(self.generation, self.criteria, self.query, rows)
+
+
+class LiveSearch(QObject):
+    """Debounced search-as-you-type over a store, run off the GUI thread.
+
+    Every new query cancels the one in flight, and only the results of the
+    latest query are delivered through results_ready. When a query extends
+    the previous one, its results are found by filtering the previous
+    results rather than searching the whole store again.
+    """
+
+    results_ready = pyqtSignal(str, str, list)  # criteria, query, rows
+
+    def __init__(self, store, delay=DEBOUNCE_MS, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.pool = QThreadPool.globalInstance()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self._start)
+        self.generation = 0
+        self.task = None
+        self.pending = None  # (criteria, query) waiting for the timer
+        self.last = None  # (criteria, query, rows) of the last delivered search
+        store.subscribe(self._store_changed)
+
+    def schedule(self, criteria, query):
+        """Search for query once typing pauses."""
+        self._cancel_task()
+        self.pending = (criteria, query)
+        self.timer.start()
+
+    def cancel(self):
+        """Drop the pending and running searches."""
+        self.timer.stop()
+        self._cancel_task()
+        self.pending = None
+
+    def _cancel_task(self):
+        if self.task is not None:
+            self.task.cancelled = True
+            self.task = None
+        self.generation += 1
+
+    def _start(self):
+        if self.pending is None:
+            return
+        criteria, query = self.pending
+        previous_rows = None
+        if self.last is not None:
+            last_criteria, last_query, last_rows = self.last
+            if last_criteria == criteria and narrows(criteria, last_query, query):
+                previous_rows = last_rows
+
+        self._cancel_task()
+        self.task = SearchTask(self.store, self.generation, criteria, query, previous_rows)
+        self.task.signals.finished.connect(self._finished)
+        self.pool.start(self.task)
+
+    def _finished(self, generation, criteria, query, rows):
+        if generation != self.generation:
+            return  # A newer query has been typed since
+        self.task = None
+        self.pending = None
+        self.last = (criteria, query, rows)
+        self.results_ready.emit(criteria, query, rows)
+
+    def _store_changed(self, *change):
+        # Cached results may be out of date; rerun a search that was in flight
+        self.last = None
+        if self.task is not None:
+            self._cancel_task()
+            QTimer.singleShot(0, self._start)
@@ -1,29 +1,31 @@
-from PyQt5.QtWidgets import QApplication, QMainWindow, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QTableWidget, QTableWidgetItem, QWidget, QComboBox, QHeaderView
-from PyQt5.QtCore import pyqtSignal, QObject, Qt
-from PyQt5.QtGui import QColor, QFont
 import csv
-import re
+from PyQt5.QtWidgets import QApplication, QMainWindow, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QTableView, QWidget, QComboBox, QHeaderView, QCheckBox, QFileDialog, QShortcut
+from PyQt5.QtCore import pyqtSignal, QObject, Qt, QTimer
+from PyQt5.QtGui import QColor, QFont, QKeySequence
+import instrumentation
+from bulk_import import import_students
 from dialogs import AddStudentDialog, UpdateStudentDialog, AddCourseDialog, UpdateCourseDialog
+from facet_bar import FacetBar
+from facets import FacetIndex
+from sorting import SortCache, make_sort_key, student_sort_value, course_sort_value
+from live_search import LiveSearch
+from models import StudentTableModel, CourseTableModel, ButtonDelegate
+from query import QueryError, compile_query
+import records
+from store import STUDENT_FIELDS, COURSE_FIELDS, QUERY_CRITERIA, SEARCH_CRITERIA, matches_search_criteria, open_stores
 
-# Constants for student fields and database files
-STUDENT_FIELDS = ['First Name', 'Middle Initial', 'Last Name', 'ID', 'Year Level', 'Gender', 'Course Code']
-STUDENT_DATABASE = 'students.csv'
-COURSE_FIELDS = ['Course Code', 'Course Name']
-COURSE_DATABASE = 'courses.csv'
-
-def get_course_data():
-    """Retrieve course data from the CSV file."""
-    course_data = []
-    with open(COURSE_DATABASE, "r", newline='', encoding="utf-8") as f:
-        reader = csv.reader(f)
-        next(reader)  # Skip header
-        for row in reader:
-            if row:
-                course_data.append(row)
-    return course_data
+# Number of rows sampled when sizing columns to their contents
+RESIZE_PRECISION = 100
+
+# Milliseconds between refreshes of the performance summary (when tracing)
+TRACE_SUMMARY_MS = 1000
+
+# How often changes saved by other instances sharing the files are picked up
+REFRESH_MS = 2000
 
 class Signal(QObject):
     course_added = pyqtSignal()
+    write_failed = pyqtSignal(str)  # emitted from the journal writer threads
 
 class StudentManagementApp(QMainWindow):
     def __init__(self):
@@ -36,20 +38,43 @@ class StudentManagementApp(QMainWindow):
         self.layout = QVBoxLayout()
         self.central_widget.setLayout(self.layout)
 
-        # Get course data
-        self.course_data = get_course_data()
+        # Load both databases once; everything else reads from these stores
+        # Storage backend is picked by STUDENT_DB_BACKEND ('csv' or 'sqlite');
+        # CSV changes are journaled next to the files and folded back in on exit;
+        # the journals are written on worker threads so edits never wait on the disk
         self.signal = Signal()
+        self.students, self.courses = open_stores(background_writes=True,
+                                                  on_write_error=lambda e: self.signal.write_failed.emit(str(e)))
+        self.course_data = self.courses.all()
+
+        # Bitmap index behind the Year Level/Gender/Course Code/Status filters
+        self.facets = FacetIndex(STUDENT_FIELDS.index('ID'))
+        if not self.students.restore_index('facets', self.facets):  # Saved with the rows on the last exit
+            self.facets.build(self.students.all())
+        self.students.subscribe(self.facets.apply_change)
+
+        # Sorted orders of the students, kept for the most recent sort specs
+        self.sort_cache = SortCache(STUDENT_FIELDS.index('ID'), student_sort_value)
+        self.sort_cache.build(self.students.all())
+        self.students.subscribe(self.sort_cache.apply_change)
 
         self.init_ui()
 
-        # Reload course data into the table
-        self.course_data = get_course_data()
-        self.populate_course_table(self.course_data)  # Refresh course table
+        # Apply each add/update/delete to the tables as a single-row change
+        self.students.subscribe(self.student_model.apply_change)
+        self.students.subscribe(self.facet_bar.refresh_counts)
+        self.courses.subscribe(self.course_model.apply_change)
+        self.courses.subscribe(self.refresh_course_data)
 
-        # Refresh student data in the table
-        self.load_student_data()  # Refresh student table     
+        # Only the student view is shown at startup; the course table is filled on the first switch
+        self.load_student_data()
         self.scroll_position = 0  
 
+        # Other workstations may edit the same files; their changes arrive as change events
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.timeout.connect(self.refresh_stores)
+        self.refresh_timer.start(REFRESH_MS)
+
     def init_ui(self):
         # Create buttons
         self.toggle_button = QPushButton("Switch to Courses")
@@ -60,47 +85,129 @@ class StudentManagementApp(QMainWindow):
 
         self.add_button = QPushButton("Add New Student")
         self.add_button.clicked.connect(self.add_student_dialog)  # Initially set to add student
+        self.import_button = QPushButton("Import Students")
+        self.import_button.clicked.connect(self.import_students_dialog)
         self.quit_button = QPushButton("Quit")
 
         # Add buttons to layout
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.add_button)
+        button_layout.addWidget(self.import_button)
         button_layout.addWidget(self.quit_button)
         self.layout.addLayout(button_layout)
 
         # Connect button signals to slots
         self.quit_button.clicked.connect(self.close)
 
-        # Initialize student table
-        self.student_table = QTableWidget()
+        # Facet filters, combined with the search (laid out below the search bar)
+        self.facet_bar = FacetBar(self.facets)
+        self.facet_bar.selection_changed.connect(self.refresh_student_view)
+
+        # Initialize student table; the view shows either the student or the course model
+        self.student_model = StudentTableModel(self)
+        self.course_model = CourseTableModel(self)
+        self.student_table = QTableView()
+        self.student_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)  # Uniform rows keep scrolling O(1)
+        self.student_table.horizontalHeader().setResizeContentsPrecision(RESIZE_PRECISION)
+        self.student_table.horizontalHeader().setStretchLastSection(True)
+        self.student_table.horizontalHeader().setSortIndicatorShown(True)
+        self.student_table.horizontalHeader().sectionClicked.connect(self.sort_by_column)
+        self.student_table.doubleClicked.connect(self.show_course_roster)
+        self.student_table.setToolTip("Double-click a course to see its students")
         self.layout.addWidget(self.student_table)
-        self.load_student_data()  # Corrected line
+
+        # Update/Delete buttons are painted by one delegate per column, not created per row
+        self.update_delegate = ButtonDelegate("Update", self.student_table)
+        self.update_delegate.clicked.connect(self.update_clicked)
+        self.delete_delegate = ButtonDelegate("Delete", self.student_table)
+        self.delete_delegate.clicked.connect(self.delete_clicked)
 
         # Add search components
         self.search_line_edit = QLineEdit()
         self.search_line_edit.setPlaceholderText("Search...")
         self.search_line_edit.returnPressed.connect(self.search_students)
         self.search_criteria_combo = QComboBox()
-        self.search_criteria_combo.addItems(STUDENT_FIELDS)
+        self.search_criteria_combo.addItems(SEARCH_CRITERIA)
+        self.search_criteria_combo.setToolTip("Query: several fields at once, e.g. year:2 course:BSCS gender:f last:lee")
         self.search_button = QPushButton("Search")
         self.search_button.clicked.connect(self.search_students)
 
+        # Search as you type; student searches run on a worker thread
+        self.live_search_check = QCheckBox("Live")
+        self.live_search_check.setChecked(True)
+        self.live_search = LiveSearch(self.students, parent=self)
+        self.live_search.results_ready.connect(self.show_student_search_results)
+        self.search_line_edit.textChanged.connect(self.search_as_you_type)
+        self.search_criteria_combo.currentTextChanged.connect(self.search_as_you_type)
+
         search_layout = QHBoxLayout()
         search_layout.addWidget(self.search_line_edit)
         search_layout.addWidget(self.search_criteria_combo)
+        search_layout.addWidget(self.live_search_check)
         search_layout.addWidget(self.search_button)
         self.layout.addLayout(search_layout)
+        self.layout.addWidget(self.facet_bar)
 
-        # Connect signal to slot
-        self.signal.course_added.connect(self.load_course_data)
+        # Number of rows in the shown view; a lazily filled view is counted in the background
+        self.row_count_label = QLabel()
+        self.statusBar().addPermanentWidget(self.row_count_label)
+        self.student_model.rows_counted.connect(self.show_row_count)
+        self.course_model.rows_counted.connect(self.show_row_count)
 
-        # Initially hide the course management buttons
-        if hasattr(self, 'student_table'):
-            self.hide_course_table_buttons(True)
+        # Connect signal to slot
+        self.signal.course_added.connect(self.refresh_course_data)
+        self.signal.write_failed.connect(self.show_write_error)
 
             # Apply styles
         self.apply_styles()
 
+        # Rolling performance summary in the status bar, only if STUDENT_DB_TRACE is set
+        if instrumentation.enabled:
+            self.trace_timer = QTimer(self)
+            self.trace_timer.timeout.connect(self.show_trace_summary)
+            self.trace_timer.start(TRACE_SUMMARY_MS)
+            QShortcut(QKeySequence("Ctrl+Shift+T"), self, activated=self.dump_trace)
+
+    def show_trace_summary(self):
+        """Show the latest timings and counters in the status bar."""
+        self.statusBar().showMessage(f"{instrumentation.summary()} | widgets: {len(QApplication.allWidgets())}")
+
+    def dump_trace(self):
+        """Write the trace recorded so far (Ctrl+Shift+T); it is also written on exit."""
+        path = instrumentation.dump()
+        self.statusBar().showMessage(f"Trace written to {path}", 5000)
+
+    def refresh_stores(self):
+        """Apply changes saved by other instances; a store that is busy is tried again on the next tick."""
+        try:
+            self.students.refresh()
+            self.courses.refresh()
+        except OSError as e:
+            self.statusBar().showMessage(f"Could not read changes from other workstations ({e}).", 10000)
+
+    def show_write_error(self, message):
+        """Report a failed background write without interrupting the user; it is retried."""
+        self.statusBar().showMessage(f"Could not save changes ({message}); retrying...", 10000)
+
+    def closeEvent(self, event):
+        """Write out queued changes and fold the journals into the CSV files before quitting."""
+        failures = []
+        for name, store in (("students", self.students), ("courses", self.courses)):
+            # Each store on its own, so one failing doesn't leave the other unsaved
+            try:
+                store.close()
+            except (OSError, RuntimeError) as e:
+                failures.append(f"{name}: {e}")
+        if failures:
+            answer = QMessageBox.question(self, "Unsaved Changes",
+                                          "Some changes could not be saved:\n" + "\n".join(failures) +
+                                          "\nQuit anyway and lose them?",
+                                          QMessageBox.Yes | QMessageBox.No)
+            if answer != QMessageBox.Yes:
+                event.ignore()
+                return
+        super().closeEvent(event)
+
     def apply_styles(self):
         # Set background color and font for the main window
         self.setStyleSheet("background-color: #f0f0f0; font-family: Arial, sans-serif; font-size: 12px;")
@@ -110,6 +217,7 @@ class StudentManagementApp(QMainWindow):
         button_style = "QPushButton { background-color: #007BFF; color: white; border: 1px solid #007BFF; border-radius: 5px; padding: 8px 16px; }"
         button_hover_style = "QPushButton:hover { background-color: #0056b3; border: 1px solid #0056b3; }"
         self.add_button.setStyleSheet(button_style + button_hover_style)
+        self.import_button.setStyleSheet(button_style + button_hover_style)
         self.quit_button.setStyleSheet(button_style + button_hover_style)
         self.toggle_button.setStyleSheet(button_style + button_hover_style)
 
@@ -125,70 +233,75 @@ class StudentManagementApp(QMainWindow):
         self.student_table.horizontalHeader().setStyleSheet(header_style)
 
         # Set styles for table rows
-        row_style = "QTableWidget::item { padding: 6px; border: none; }"
+        row_style = "QTableView::item { padding: 6px; border: none; }"
         self.student_table.setStyleSheet(row_style)
 
+    def search_as_you_type(self, *_):
+        """Search the current view as the query or criteria changes, if live search is on."""
+        if not self.live_search_check.isChecked():
+            return
+        if self.toggle_button.isChecked():
+            self.search_courses()  # Few courses; searching them inline is instant
+            return
+        query = self.search_line_edit.text().strip().lower()
+        if not query:
+            self.live_search.cancel()
+            self.show_full_view(self.student_model, self.load_student_data)  # All students if query is empty
+            return
+        criteria = self.search_criteria_combo.currentText()
+        if criteria == QUERY_CRITERIA:
+            try:
+                compile_query(query)
+            except QueryError:
+                return  # Still being typed; keep showing the last results
+        self.live_search.schedule(criteria, query)
+
+    def show_student_search_results(self, criteria, query, filtered_students):
+        """Show the results of a live student search."""
+        if self.toggle_button.isChecked():
+            return  # Switched to the course view while searching
+        accepts = lambda row: matches_search_criteria(row, criteria, query)  # Students added or changed later
+        self.show_students(filtered_students, accepts)
+
+    def refresh_student_view(self):
+        """Show the students matching the current search and facet filters."""
+        if self.search_line_edit.text().strip():
+            self.search_students()
+        else:
+            self.load_student_data()
+
+    def show_students(self, students, accepts=None):
+        """Show the students that also pass the facet filters."""
+        if self.facet_bar.is_active():
+            selection = self.facet_bar.selection()
+            keep = set(self.facets.select(selection))
+            students = [row for row in students if row[3] in keep]
+            facet_accepts = self.facets.accepts(selection)
+            search_accepts = accepts
+            accepts = facet_accepts if search_accepts is None else (lambda row: facet_accepts(row) and search_accepts(row))
+        self.populate_student_table(students, accepts)
+
     def search_students(self):
         """Search for students based on the selected criteria."""
         query = self.search_line_edit.text().strip().lower()
         criteria = self.search_criteria_combo.currentText()
+        self.live_search.cancel()
 
         if not query:
-            self.load_student_data()  # Reload all student data if query is empty
+            self.show_full_view(self.student_model, self.load_student_data)  # All students if query is empty
             return
 
-        filtered_students = []
-        with open(STUDENT_DATABASE, "r", newline='', encoding="utf-8") as f:
-            reader = csv.reader(f)
-            next(reader)  # Skip header
-            for row in reader:
-                if row:
-                    if self.matches_search_criteria(row, criteria, query):
-                        filtered_students.append(row)
-
-        self.populate_student_table(filtered_students)  # Update table with filtered results
+        try:
+            filtered_students = self.students.search(criteria, query)
+        except QueryError as e:
+            QMessageBox.warning(self, "Error", f"Invalid query: {e}")
+            return
+        accepts = lambda row: matches_search_criteria(row, criteria, query)  # Students added or changed later
+        self.show_students(filtered_students, accepts)  # Update table with filtered results
 
     def matches_search_criteria(self, student_data, criteria, query):
         """Check if a student matches the search criteria."""
-        data_value = student_data[self.get_field_index(criteria)].lower()
-
-        if criteria == 'ID':
-            # Check if query is an exact match or substring of the ID (case-insensitive)
-            return query.lower() in data_value
-        elif criteria == 'Name':
-            # Check if query is a substring of any part of the name (Last Name, First Name, Middle Initial)
-            name_parts = [part.strip().lower() for part in student_data[0].split(',')]
-            return any(query.lower() in part for part in name_parts)
-        elif criteria == 'Gender':
-            # Check if the first character of the gender matches the query ('M' or 'F')
-            return data_value.startswith(query.lower())
-        else:
-            # Check if query is a substring of the specified criteria (case-insensitive)
-            return query.lower() in data_value
-
-
-    def get_field_index(self, criteria):
-        """Get the index of the field based on the criteria."""
-        fields = ['First Name', 'Middle Initial', 'Last Name', 'ID', 'Year Level', 'Gender', 'Course Code']
-        return fields.index(criteria)
-
-    def populate_student_table(self, students_data):
-        """Populate the student table with the provided student data."""
-        num_rows = len(students_data)
-        num_cols = len(STUDENT_FIELDS)
-
-        self.student_table.setRowCount(num_rows)
-        self.student_table.setColumnCount(num_cols)
-        self.student_table.setHorizontalHeaderLabels(STUDENT_FIELDS)
-
-        for row_index, row_data in enumerate(students_data):
-            for col_index, col_data in enumerate(row_data):
-                item = QTableWidgetItem(col_data)
-                self.student_table.setItem(row_index, col_index, item)
-
-        # Adjust column widths to fit content
-        self.student_table.resizeColumnsToContents()
-        self.student_table.horizontalHeader().setStretchLastSection(True)
+        return matches_search_criteria(student_data, criteria, query)
 
     def search_courses(self):
         """Search for courses based on the selected criteria."""
@@ -196,311 +309,253 @@ class StudentManagementApp(QMainWindow):
         criteria = self.search_criteria_combo.currentText()
 
         if not query:
-            self.load_course_data()  # Reload all course data if query is empty
+            self.show_full_view(self.course_model, self.load_course_data)  # All courses if query is empty
             return
 
-        filtered_courses = []
-        with open(COURSE_DATABASE, "r", newline='', encoding="utf-8") as f:
-            reader = csv.reader(f)
-            next(reader)  # Skip header
-            for row in reader:
-                if row:
-                    if criteria == 'Course Code' and query in row[0].lower():
-                        filtered_courses.append(row)
-                    elif criteria == 'Course Name' and query in row[1].lower():
-                        filtered_courses.append(row)
+        column = COURSE_FIELDS.index(criteria)
+        accepts = lambda row: query in row[column].lower()  # Courses added or changed later
+        filtered_courses = self.courses.search(criteria, query)
 
-        self.populate_course_table(filtered_courses)  # Update table with filtered results
+        self.populate_course_table(filtered_courses, accepts)  # Update table with filtered results
 
 
     def toggle_data(self, checked):
         """Toggle between student data and course data."""
         if checked:
             self.toggle_button.setText("Switch to Students")
-            self.load_course_data()
+            self.show_full_view(self.course_model, self.load_course_data)
+            self.facet_bar.setVisible(False)
+            self.import_button.setVisible(False)
             self.add_button.setText("Add New Course")
             self.add_button.clicked.disconnect(self.add_student_dialog)
             self.add_button.clicked.connect(self.add_course_dialog)
-            if hasattr(self, 'student_table'):
-                self.hide_student_table_buttons(True)  # Hide student table buttons
-                self.hide_course_table_buttons(False)  # Show course table buttons
-                self.update_delete_buttons_visibility(course_view=True)  # Show course update and delete buttons
 
             # Change search criteria for course view
+            self.search_criteria_combo.blockSignals(True)  # Don't search while refilling
             self.search_criteria_combo.clear()
             self.search_criteria_combo.addItems(COURSE_FIELDS)
+            self.search_criteria_combo.blockSignals(False)
             self.search_button.clicked.disconnect(self.search_students)
             self.search_button.clicked.connect(self.search_courses)
         else:
             self.toggle_button.setText("Switch to Courses")
-            self.load_student_data()
+            self.show_full_view(self.student_model, self.load_student_data)
+            self.facet_bar.setVisible(True)
+            self.import_button.setVisible(True)
             self.add_button.setText("Add New Student")
             self.add_button.clicked.disconnect(self.add_course_dialog)
             self.add_button.clicked.connect(self.add_student_dialog)
-            if hasattr(self, 'student_table'):
-                self.hide_student_table_buttons(False)  # Show student table buttons
-                self.hide_course_table_buttons(True)  # Hide course table buttons
-                self.update_delete_buttons_visibility(course_view=False)  # Hide course update and delete buttons
 
             # Change search criteria for student view
+            self.search_criteria_combo.blockSignals(True)  # Don't search while refilling
             self.search_criteria_combo.clear()
-            self.search_criteria_combo.addItems(STUDENT_FIELDS)
+            self.search_criteria_combo.addItems(SEARCH_CRITERIA)
+            self.search_criteria_combo.blockSignals(False)
             self.search_button.clicked.disconnect(self.search_courses)
             self.search_button.clicked.connect(self.search_students)
 
-    def update_delete_buttons_visibility(self, course_view):
-        """Hide or show the update and delete buttons based on the view."""
-        if hasattr(self, 'student_table'):
-            num_cols = self.student_table.columnCount()
-            for i in range(self.student_table.rowCount()):
-                update_button = self.student_table.cellWidget(i, num_cols - 2)
-                delete_button = self.student_table.cellWidget(i, num_cols - 1)
-                if course_view:
-                    # Show course update and delete buttons
-                    if update_button:
-                        update_button.setVisible(True)
-                    if delete_button:
-                        delete_button.setVisible(True)
-                else:
-                    # Hide course update and delete buttons
-                    if update_button:
-                        update_button.setVisible(False)
-                    if delete_button:
-                        delete_button.setVisible(False)
+    def show_full_view(self, model, load):
+        """Show model's full view, calling load only if the model holds search results or nothing yet."""
+        if model.complete:
+            self.show_model(model)  # Change events have kept it current while hidden
+        else:
+            load()
 
     def load_student_data(self):
         """Load student data into the table with 'Status' column."""
-        with open(STUDENT_DATABASE, "r", newline='', encoding="utf-8") as f:
-            reader = csv.reader(f)
-            data = list(reader)
-            students_data = self.compute_student_status(data)
-            self.populate_student_table(students_data)
-
-    def compute_student_status(self, data):
-        """Compute the 'Status' (Enrolled/Unenrolled) based on the course."""
-        students_data = []
-        
-        # Extract course codes from course_data for validation
-        valid_course_codes = [course[0] for course in self.course_data]
-
-        for row in data[1:]:  # Exclude the header row
-            if len(row) >= 7:  # Check if the row has at least 7 elements
-                first_name = row[0]
-                middle_initial = row[1]
-                last_name = row[2]
-                id_value = row[3]
-                year_level = row[4]
-                gender = row[5]
-                course_code = row[6]
-
-                # Determine status based on course
-                if course_code.lower() != "none":
-                    status = "Enrolled"
-                else:
-                    status = "Unenrolled"
-
-                # Append data including status to students_data
-                students_data.append([first_name, middle_initial, last_name, id_value, year_level, gender, course_code, status])
-            else:
-                # Handle rows that don't have enough elements (e.g., missing course code)
-                # You can choose to skip these rows or handle them differently based on your requirements
-                print(f"Skipping row due to insufficient data: {row}")
-
-        return students_data
+        if self.facet_bar.is_active():
+            # Read just the selected rows straight off the facet bitmaps
+            selection = self.facet_bar.selection()
+            students_data = (self.students.get(key) for key in self.facets.select(selection))
+            self.populate_student_table(students_data, self.facets.accepts(selection), complete=True)
+            return
+        if self.student_model.sort_spec:
+            # Cached permutation; only sorted again after the sort order changes
+            keys = self.sort_cache.sorted_keys(self.student_model.sort_spec, self.students.all)
+            students_data = (self.students.get(key) for key in keys)
+            self.populate_student_table(students_data, presorted=True, complete=True)
+            return
+        # The model computes each 'Status' cell as it is painted; rows are shown
+        # as the table scrolls to them
+        self.populate_student_table(self.students.all(), complete=True)
 
-    def populate_student_table(self, students_data):
+    def populate_student_table(self, students_data, accepts=None, presorted=False, complete=False):
         """Populate the student table with data including the 'Status' column."""
-        self.student_table.clear()  # Clear existing data
-        num_columns = len(STUDENT_FIELDS) + 3  # Additional columns for 'Status', 'Update', and 'Delete'
-        self.student_table.setColumnCount(num_columns)
-        self.student_table.setRowCount(len(students_data))
-
-        headers = STUDENT_FIELDS + ["Status", "Action", "Action"]
-        self.student_table.setHorizontalHeaderLabels(headers)
-
-        for i, row_data in enumerate(students_data):
-            for j, cell in enumerate(row_data):
-                item = QTableWidgetItem(cell)
-                self.student_table.setItem(i, j, item)
-
-            # Compute status based on course code (index 6 is the course code column)
-            course_code = row_data[6].strip().lower()
-            if course_code != "none":
-                status = "Enrolled"
-            else:
-                status = "Unenrolled"
+        anchor = self.table_anchor(self.student_model)
+        self.student_model.set_rows(students_data, accepts, presorted, complete)
+        self.show_model(self.student_model)
+        self.restore_table_anchor(self.student_model, anchor)
 
-            # Add status item to the 'Status' column
-            status_item = QTableWidgetItem(status)
-            self.student_table.setItem(i, len(STUDENT_FIELDS), status_item)
+    def populate_course_table(self, data, accepts=None, complete=False):
+        """Populate the course table with data and dynamically resize columns."""
+        anchor = self.table_anchor(self.course_model)
+        self.course_model.set_rows(data, accepts, complete=complete)
+        self.show_model(self.course_model)
+        self.restore_table_anchor(self.course_model, anchor)
+
+    def table_anchor(self, model):
+        """Return the keys of the current and top visible rows if model is shown."""
+        if self.student_table.model() is not model or model.rowCount() == 0:
+            return None, None
+        current = self.student_table.currentIndex()
+        top_row = self.student_table.rowAt(0)
+        return (model.key(current.row()) if current.isValid() else None,
+                model.key(top_row) if top_row >= 0 else None)
+
+    def restore_table_anchor(self, model, anchor):
+        """Scroll back to and reselect the rows remembered by table_anchor."""
+        current_key, top_key = anchor
+        if top_key is not None and model.position(top_key) is not None:
+            model.reveal(model.position(top_key))
+            self.student_table.scrollTo(model.index(model.position(top_key), 0), QTableView.PositionAtTop)
+        if current_key is not None and model.position(current_key) is not None:
+            model.reveal(model.position(current_key))
+            self.student_table.setCurrentIndex(model.index(model.position(current_key), 0))
+
+    def show_model(self, model):
+        """Show model in the table, with Update/Delete delegates on its action columns."""
+        if self.student_table.model() is not model:
+            old_model = self.student_table.model()
+            if old_model is not None:
+                for column in old_model.action_columns():
+                    self.student_table.setItemDelegateForColumn(column, None)
+            self.student_table.setModel(model)
+            update_column, delete_column = model.action_columns()
+            self.student_table.setItemDelegateForColumn(update_column, self.update_delegate)
+            self.student_table.setItemDelegateForColumn(delete_column, self.delete_delegate)
 
-            # Add update button
-            update_button = QPushButton("Update")
-            update_button.clicked.connect(lambda _, row=i: self.update_student_dialog(row))
-            self.student_table.setCellWidget(i, len(STUDENT_FIELDS) + 1, update_button)
+        header = self.student_table.horizontalHeader()
+        if model.sort_spec:
+            column, descending = model.sort_spec[0]
+            header.setSortIndicator(column, Qt.DescendingOrder if descending else Qt.AscendingOrder)
+        else:
+            header.setSortIndicator(-1, Qt.AscendingOrder)
 
-            # Add delete button
-            delete_button = QPushButton("Delete")
-            delete_button.clicked.connect(lambda _, row=i: self.confirm_delete_student(row))
-            self.student_table.setCellWidget(i, len(STUDENT_FIELDS) + 2, delete_button)
+        # Resize columns to fit content (only a sample of rows is measured)
+        self.student_table.resizeColumnsToContents()
+        self.show_row_count()
 
-        # Hide update and delete buttons for course entries
-        self.update_delete_buttons_visibility(False)
+    def show_row_count(self, *_):
+        """Show how many rows the current view has, once they are counted."""
+        model = self.student_table.model()
+        if model is None:
+            return
+        total = model.total()
+        noun = "students" if model is self.student_model else "courses"
+        self.row_count_label.setText(f"Counting {noun}..." if total is None else f"{total} {noun}")
+
+    def sort_by_column(self, column):
+        """Sort by a clicked column; Shift+click adds it as a further sort key."""
+        model = self.student_table.model()
+        if column in model.action_columns():
+            return
+        spec = list(model.sort_spec)
+        columns = [sort_column for sort_column, descending in spec]
+        if QApplication.keyboardModifiers() & Qt.ShiftModifier:
+            if column in columns:
+                i = columns.index(column)
+                spec[i] = (column, not spec[i][1])  # Reverse this key only
+            else:
+                spec.append((column, False))
+        elif columns == [column]:
+            spec = [(column, not spec[0][1])]
+        else:
+            spec = [(column, False)]
 
-    def populate_course_table(self, data):
-        """Populate the course table with data and dynamically resize columns."""
-        num_rows = len(data)
-        num_cols = len(COURSE_FIELDS) + 2  # Additional columns for 'Update' and 'Delete'
-
-        self.student_table.clear()  # Clear existing data
-        self.student_table.setRowCount(num_rows)
-        self.student_table.setColumnCount(num_cols)
-        headers = COURSE_FIELDS + ["Update", "Delete"]
-        self.student_table.setHorizontalHeaderLabels(headers)
-
-        # Populate table data and determine initial column widths
-        column_widths = [0] * num_cols
-        for i, row in enumerate(data):
-            for j, cell in enumerate(row):
-                item = QTableWidgetItem(cell)
-                self.student_table.setItem(i, j, item)
-
-                # Update column width based on content length
-                column_widths[j] = max(column_widths[j], len(cell) * 10)  # Adjust multiplier as needed
-
-            # Add 'Update' button
-            update_button = QPushButton("Update")
-            update_button.clicked.connect(lambda _, idx=i: self.update_course_dialog(idx))
-            self.student_table.setCellWidget(i, num_cols - 2, update_button)
-
-            # Add 'Delete' button
-            delete_button = QPushButton("Delete")
-            delete_button.clicked.connect(lambda _, idx=i: self.confirm_delete_course(idx))
-            self.student_table.setCellWidget(i, num_cols - 1, delete_button)
-
-        # Set column widths based on calculated maximums
-        for col in range(num_cols):
-            self.student_table.setColumnWidth(col, column_widths[col])
-
-        # Set horizontal header resize mode to stretch last section
-        header = self.student_table.horizontalHeader()
-        header.setSectionResizeMode(QHeaderView.Stretch)
+        if model is self.student_model:
+            model.set_sort(spec, self.sort_cache.row_key(spec))
+            self.refresh_student_view()
+        else:
+            model.set_sort(spec, make_sort_key(spec, course_sort_value))
+            if self.search_line_edit.text().strip():
+                self.search_courses()
+            else:
+                self.load_course_data()
 
-        # Resize columns to fit content
-        self.resize_columns_to_fit()
+    def update_clicked(self, row):
+        """Open the update dialog for the row whose Update button was clicked."""
+        if self.student_table.model() is self.course_model:
+            self.update_course_dialog(self.course_model.key(row))
+        else:
+            self.update_student_dialog(self.student_model.key(row))
 
-    def resize_columns_to_fit(self):
-        """Resize each column in the table to fit its content."""
-        header = self.student_table.horizontalHeader()
-        for col in range(self.student_table.columnCount()):
-            header.setSectionResizeMode(col, QHeaderView.ResizeToContents)
-    
-    def hide_student_table_buttons(self, hide):
-        """Hide or show the update and delete buttons in the student data table."""
-        if hasattr(self, 'student_table'):
-            num_columns = self.student_table.columnCount()
-            for i in range(self.student_table.rowCount()):
-                for j in range(num_columns - 2, num_columns):
-                    item = self.student_table.cellWidget(i, j)
-                    if item:
-                        item.setVisible(not hide)
-
-    def hide_course_table_buttons(self, hide):
-        """Hide or show the update and delete buttons in the course data table."""
-        if hasattr(self, 'student_table'):
-            num_columns = self.student_table.columnCount()
-            for i in range(self.student_table.rowCount()):
-                update_button = self.student_table.cellWidget(i, num_columns - 2)
-                delete_button = self.student_table.cellWidget(i, num_columns - 1)
-                if update_button:
-                    update_button.setVisible(not hide)
-                if delete_button:
-                    delete_button.setVisible(not hide)
+    def delete_clicked(self, row):
+        """Confirm deletion of the row whose Delete button was clicked."""
+        if self.student_table.model() is self.course_model:
+            self.confirm_delete_course(self.course_model.key(row))
+        else:
+            self.confirm_delete_student(self.student_model.key(row))
 
     def load_course_data(self):
         """Load course data into the table."""
-        self.course_data = get_course_data()  # Reload course data
-        self.student_table.clear()  # Clear existing data
-        self.student_table.setColumnCount(len(COURSE_FIELDS) + 2)  # Add two columns for actions
-        self.student_table.setRowCount(len(self.course_data))
-        headers = COURSE_FIELDS + ["Update", "Delete"]
-        self.student_table.setHorizontalHeaderLabels(headers)
-
-        for i, row in enumerate(self.course_data):
-            for j, cell in enumerate(row):
-                item = QTableWidgetItem(cell)
-                self.student_table.setItem(i, j, item)
-
-            # Add update button
-            update_button = QPushButton("Update")
-            update_button.clicked.connect(lambda _, i=i: self.update_course_dialog(i))
-            self.student_table.setCellWidget(i, len(COURSE_FIELDS), update_button)
-
-            # Add delete button
-            delete_button = QPushButton("Delete")
-            delete_button.clicked.connect(lambda _, i=i: self.confirm_delete_course(i))
-            self.student_table.setCellWidget(i, len(COURSE_FIELDS) + 1, delete_button)
-
-        # Hide the update and delete buttons for student entries
-        self.update_delete_buttons_visibility(False)
+        self.course_data = self.courses.all()  # Reload course data
+        self.populate_course_table(self.course_data, complete=True)
+
+    def show_course_roster(self, index):
+        """Show the students of a double-clicked course."""
+        if self.student_table.model() is not self.course_model:
+            return
+        course_code = self.course_model.key(index.row())
+        self.toggle_button.setChecked(False)  # Back to the student view
+        accepts = lambda row: row[6] == course_code
+        self.show_students(self.students.roster(course_code), accepts)
+
+    def refresh_course_data(self, *change):
+        """Keep the course list offered by the student dialogs up to date."""
+        self.course_data = self.courses.all()
 
     def add_student_dialog(self):
         """Open dialog to add a new student."""
-        dialog = AddStudentDialog(self, self.course_data)
+        dialog = AddStudentDialog(self, self.course_data, self.students, self.courses)
         dialog.exec_()
-        self.load_student_data()
+
+    def import_students_dialog(self):
+        """Import students from a CSV file and report the rows that were rejected."""
+        path, _ = QFileDialog.getOpenFileName(self, "Import Students", "", "CSV files (*.csv)")
+        if not path:
+            return
+        try:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                report = import_students(self.students, path, self.courses.keys())
+            finally:
+                QApplication.restoreOverrideCursor()
+        except (OSError, KeyError, ValueError, csv.Error) as e:
+            # ValueError covers a file that isn't UTF-8 text; csv.Error one with NUL bytes
+            QMessageBox.warning(self, "Error", f"Import failed: {e}")
+            return
+
+        if not report.errors:
+            QMessageBox.information(self, "Success", report.summary())
+            return
+        answer = QMessageBox.question(self, "Import Finished", report.summary() + "\nSave the list of errors?",
+                                      QMessageBox.Yes | QMessageBox.No)
+        if answer == QMessageBox.Yes:
+            report_path, _ = QFileDialog.getSaveFileName(self, "Save Import Errors", "import_errors.csv", "CSV files (*.csv)")
+            if report_path:
+                report.write(report_path)
 
     def add_course_dialog(self):
         """Open dialog to add a new course."""
-        dialog = AddCourseDialog(self)
+        dialog = AddCourseDialog(self, self.courses)
         dialog.exec_()
 
-    def update_course_dialog(self, row):
+    def update_course_dialog(self, course_code):
         """Open dialog to update course information."""
-        dialog = UpdateCourseDialog(self, row)
+        dialog = UpdateCourseDialog(self, course_code, self.courses, self.students)
         dialog.exec_()
-        self.load_course_data()
-
-    def delete_course(self, row):
-        """Delete a course from the CSV file and update student data."""
-        if row >= 0 and row < len(self.course_data):
-            course_code_to_delete = self.course_data[row][0]
-
-            # Remove the course from the CSV file
-            with open(COURSE_DATABASE, "r", newline='', encoding="utf-8") as f:
-                reader = csv.reader(f)
-                data = list(reader)
-
-            updated_data = [course for course in data if course[0] != course_code_to_delete]
-
-            with open(COURSE_DATABASE, "w", newline='', encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerows(updated_data)
-
-            # Update student data where necessary
-            updated_students = []
-            with open(STUDENT_DATABASE, "r", newline='', encoding="utf-8") as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if row[6] == course_code_to_delete:
-                        # If student was enrolled in the deleted course, update their course to "None"
-                        row[6] = "None"
-                    updated_students.append(row)
-
-            # Write updated student data back to the CSV file
-            with open(STUDENT_DATABASE, "w", newline='', encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerows(updated_students)
-
-            QMessageBox.information(self, "Success", "Course deleted successfully.")
-
-            # Reload course data into the table
-            self.course_data = get_course_data()
-            self.populate_course_table(self.course_data)  # Refresh course table
-        else:
-            QMessageBox.warning(self, "Error", "Invalid row index for course deletion.")
 
-    def confirm_delete_course(self, row):
+    def delete_course(self, course_code_to_delete):
+        """Delete a course and update student data."""
+        try:
+            # Students enrolled in the deleted course have their course set to "None"
+            records.delete_course(self.students, self.courses, course_code_to_delete)
+        except KeyError:
+            QMessageBox.warning(self, "Error", "Course not found for deletion.")
+            return
+        QMessageBox.information(self, "Success", "Course deleted successfully.")
+
+    def confirm_delete_course(self, course_code):
             """Confirm deletion of a course."""
             confirmation = QMessageBox.question(
                 self,
@@ -509,53 +564,26 @@ class StudentManagementApp(QMainWindow):
                 QMessageBox.Yes | QMessageBox.No
             )
             if confirmation == QMessageBox.Yes:
-                self.delete_course(row)  # Call the delete_course method to delete the course
+                self.delete_course(course_code)  # Call the delete_course method to delete the course
 
-    def update_student_dialog(self, row):
+    def update_student_dialog(self, id_value):
         """Open dialog to update student information."""
-        # Save the current scroll position
-        scroll_position = self.student_table.verticalScrollBar().value()
-
-        dialog = UpdateStudentDialog(self, row, self.course_data)
+        dialog = UpdateStudentDialog(self, id_value, self.course_data, self.students, self.courses)
         dialog.exec_()
 
-        # Reload student data into the table
-        self.load_student_data()
-
-        # Restore the scroll position
-        self.student_table.verticalScrollBar().setValue(scroll_position)
-
-    def confirm_delete_student(self, row):
+    def confirm_delete_student(self, id_value):
         """Confirm deletion of a student."""
         confirmation = QMessageBox.question(self, "Confirm Deletion", "Are you sure you want to delete this student?",
                                             QMessageBox.Yes | QMessageBox.No)
         if confirmation == QMessageBox.Yes:
-            self.delete_student(row + 1)
+            self.delete_student(id_value)
 
-    def delete_student(self, row):
+    def delete_student(self, id_value):
         """Delete a student."""
-        # Save the current scroll position
-        scroll_position = self.student_table.verticalScrollBar().value()
-
-        with open(STUDENT_DATABASE, "r", newline='', encoding="utf-8") as f:
-            reader = csv.reader(f)
-            data = list(reader)
-
-        # Check if the row index is within the data range
-        if 0 < row <= len(data):
-            del data[row]  # Adjusted index to match list indexing (0-based)
-
-            with open(STUDENT_DATABASE, "w", newline='', encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerows(data)
-
-            # Reload student data into the table
-            self.load_student_data()
-
-            # Restore the scroll position
-            self.student_table.verticalScrollBar().setValue(scroll_position)
-        else:
-            QMessageBox.warning(self, "Error", "Invalid row index for student deletion.")
+        try:
+            records.delete_student(self.students, id_value)  # The table drops just this row
+        except KeyError:
+            QMessageBox.warning(self, "Error", "Student not found for deletion.")
 
 
 
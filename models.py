@@ -0,0 +1,297 @@
+import bisect
+from itertools import islice
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+from PyQt5.QtCore import QAbstractTableModel, QEvent, QModelIndex, Qt, QTimer, pyqtSignal
+from events import INSERTED, CHANGED, REMOVED
+from instrumentation import count, span
+from store import STUDENT_FIELDS, COURSE_FIELDS
+
+# Rows handed to the view at a time; the first page is all a reset has to show
+PAGE_SIZE = 1000
+
+# Rows pulled from a lazy source per idle tick while it is counted
+COUNT_CHUNK = 20000
+
+
+class RowTableModel(QAbstractTableModel):
+    """Table model over a list of in-memory rows.
+
+    The view only asks for the cells it is about to paint, so nothing is
+    created per row up front. The last columns are action columns drawn by
+    ButtonDelegate; they have no data of their own.
+
+    apply_change() takes the store's row-level change events and inserts,
+    changes or removes just the affected row, so the view keeps its selection
+    and scroll position. With a sort key set, rows are kept in that order and
+    new or moved rows are placed with a binary search. Rows are found the
+    same way: by their sort key, or in store order by an ordinal handed out
+    as rows arrive, so no event renumbers the rows after the one it touched.
+
+    Rows reach the view a page at a time through canFetchMore()/fetchMore(),
+    as it scrolls down. set_rows() also takes an iterator (None items, rows
+    deleted before they were reached, are skipped): it is pulled only as far
+    as the pages shown, and the rest is counted on idle turns of the event
+    loop. rows_counted(total) is emitted whenever the total is known.
+    """
+
+    rows_counted = pyqtSignal(int)
+
+    def __init__(self, headers, key_index, num_actions=2, parent=None):
+        super().__init__(parent)
+        self.headers = headers
+        self.key_index = key_index
+        self.num_actions = num_actions
+        self.rows = []  # every row pulled so far; the first `shown` of them are in the view
+        self.shown = 0
+        self._source = None  # iterator over the rows not pulled yet, or None
+        self._counter = QTimer(self)
+        self._counter.setInterval(0)  # Runs whenever the event loop is idle
+        self._counter.timeout.connect(lambda: self._pull(len(self.rows) + COUNT_CHUNK))
+        self.accepts = None  # Predicate new and changed rows must pass to be shown
+        self.complete = False  # Whether the rows are a full (unsearched) view, kept current by change events
+        self._by_key = None  # key -> row for every row pulled, built on first use
+        self._order = None  # key -> ordinal increasing along the rows, when they are in store order
+        self._next_order = 0
+        self.sort_key = None  # Key function rows are ordered by, or None for store order
+        self.sort_spec = ()  # ((column, descending), ...) described by sort_key
+
+    def set_sort(self, spec, sort_key):
+        """Order rows by sort_key from the next set_rows() on."""
+        self.sort_spec = tuple(spec)
+        self.sort_key = sort_key if spec else None
+
+    def set_rows(self, rows, accepts=None, presorted=False, complete=False):
+        """Replace every row shown by the model; complete marks them as the full view, not search results.
+
+        rows is a list, or any iterable to be pulled lazily.
+        """
+        with span('table.populate', 'ui', model=type(self).__name__) as timing:
+            source = None
+            if self.sort_key is not None and not presorted:
+                rows = sorted(rows, key=self.sort_key)
+            elif not isinstance(rows, list):
+                source, rows = iter(rows), []
+            self.beginResetModel()
+            self.rows = rows
+            self._source = source
+            self.shown = 0
+            self.accepts = accepts
+            self.complete = complete
+            self._by_key = self._order = None
+            self._pull(PAGE_SIZE)
+            self.shown = min(PAGE_SIZE, len(self.rows))
+            self.endResetModel()
+            timing.set(rows=self.shown)
+        count('rows populated', self.shown)
+        if source is None:
+            self.rows_counted.emit(len(self.rows))
+        elif self._source is not None:
+            self._counter.start()  # The first page did not use it all up
+
+    def _pull(self, needed=None):
+        """Pull rows from the lazy source until needed rows (or all of them) are known."""
+        while self._source is not None and (needed is None or len(self.rows) < needed):
+            chunk = list(islice(self._source, None if needed is None else needed - len(self.rows)))
+            if not chunk:
+                self._source = None
+                self._counter.stop()
+                self.rows_counted.emit(len(self.rows))
+                break
+            self.rows.extend(row for row in chunk if row is not None)
+            self._by_key = self._order = None
+
+    def total(self):
+        """Return the number of rows, or None while they are still being counted."""
+        return len(self.rows) if self._source is None else None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and (self.shown < len(self.rows) or self._source is not None)
+
+    def fetchMore(self, parent=QModelIndex()):
+        self.reveal(self.shown + PAGE_SIZE - 1)
+
+    def reveal(self, position):
+        """Hand the view every row up to position (as far as there are rows)."""
+        self._pull(position + 1)
+        end = min(position + 1, len(self.rows))
+        if end > self.shown:
+            self.beginInsertRows(QModelIndex(), self.shown, end - 1)
+            self.shown = end
+            self.endInsertRows()
+
+    def key(self, row):
+        """Return the key (ID or Course Code) of the row at position row."""
+        return self.rows[row][self.key_index]
+
+    def _index(self):
+        """Build the lookups behind position() for rows set or pulled since the last call."""
+        if self._by_key is None:
+            key_index = self.key_index
+            self._by_key = {row[key_index]: row for row in self.rows}
+            if self.sort_key is None:
+                self._order = {row[key_index]: i for i, row in enumerate(self.rows)}
+                self._next_order = len(self.rows)
+
+    def position(self, key):
+        """Return the position of the row with key, or None if it is not in the model (see reveal())."""
+        self._index()
+        row = self._by_key.get(key)
+        if row is None:
+            return None
+        if self.sort_key is None:
+            order, key_index = self._order, self.key_index
+            return bisect.bisect_left(self.rows, order[key], key=lambda row: order[row[key_index]])
+        # The row is among those with an equal sort key
+        target = self.sort_key(row)
+        low = bisect.bisect_left(self.rows, target, key=self.sort_key)
+        high = bisect.bisect_right(self.rows, target, lo=low, key=self.sort_key)
+        for position in range(low, high):
+            if self.rows[position] is row:
+                return position
+        return self.rows.index(row)  # Its sort key moved under it (the key it sorts by was renamed or removed)
+
+    def apply_change(self, change, key, row):
+        """Apply one store change event to the shown rows."""
+        self._pull()  # Every row must be known to find the one that changed
+        position = self.position(key)
+        shown = row is not None and (self.accepts is None or self.accepts(row))
+        if change == INSERTED or (change == CHANGED and position is None):
+            if shown:
+                self._insert(row)
+        elif change == CHANGED:
+            if not shown:
+                self._remove(position, key)
+                return
+            if self.sort_key is not None and self.sort_key(row) != self.sort_key(self.rows[position]):
+                # Sorted position changed; move the row
+                self._remove(position, key)
+                self._insert(row)
+                return
+            self.rows[position] = row
+            new_key = row[self.key_index]
+            del self._by_key[key]
+            self._by_key[new_key] = row
+            if self._order is not None and new_key != key:
+                self._order[new_key] = self._order.pop(key)
+            if position < self.shown:
+                self.dataChanged.emit(self.index(position, 0), self.index(position, len(self.headers) - 1))
+        elif change == REMOVED and position is not None:
+            self._remove(position, key)
+
+    def _insert(self, row):
+        position = len(self.rows)
+        if self.sort_key is not None:
+            position = bisect.bisect_right(self.rows, self.sort_key(row), key=self.sort_key)
+        # Rows landing past the fetched pages reach the view when it fetches them
+        visible = position < self.shown or self.shown == len(self.rows)
+        if visible:
+            self.beginInsertRows(QModelIndex(), position, position)
+        self.rows.insert(position, row)
+        self._index()
+        key = row[self.key_index]
+        self._by_key[key] = row
+        if self._order is not None:
+            self._order[key] = self._next_order  # Unsorted rows are only ever added at the end
+            self._next_order += 1
+        if visible:
+            self.shown += 1
+            self.endInsertRows()
+        self.rows_counted.emit(len(self.rows))
+
+    def _remove(self, position, key):
+        visible = position < self.shown
+        if visible:
+            self.beginRemoveRows(QModelIndex(), position, position)
+        del self.rows[position]
+        del self._by_key[key]
+        if self._order is not None:
+            del self._order[key]
+        if visible:
+            self.shown -= 1
+            self.endRemoveRows()
+        self.rows_counted.emit(len(self.rows))
+
+    def action_columns(self):
+        """Return the indexes of the action columns."""
+        return list(range(len(self.headers) - self.num_actions, len(self.headers)))
+
+    def value(self, row, column):
+        """Return the text shown in a data cell."""
+        row_data = self.rows[row]
+        return row_data[column] if column < len(row_data) else ""
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.shown
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.column() >= len(self.headers) - self.num_actions:
+            return None
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.value(index.row(), index.column())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return section + 1
+
+
+class StudentTableModel(RowTableModel):
+    """Students with a computed 'Status' column and Update/Delete actions."""
+
+    def __init__(self, parent=None):
+        super().__init__(STUDENT_FIELDS + ["Status", "Action", "Action"], STUDENT_FIELDS.index('ID'), parent=parent)
+
+    def value(self, row, column):
+        if column == len(STUDENT_FIELDS):
+            # Compute status based on course code (index 6 is the course code column)
+            return "Enrolled" if self.rows[row][6].strip().lower() != "none" else "Unenrolled"
+        return super().value(row, column)
+
+
+class CourseTableModel(RowTableModel):
+    """Courses with Update/Delete actions."""
+
+    def __init__(self, parent=None):
+        super().__init__(COURSE_FIELDS + ["Update", "Delete"], COURSE_FIELDS.index('Course Code'), parent=parent)
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """Paints a push button in every cell of a column and reports clicks by row.
+
+    One delegate serves the whole column, so no widget exists per row.
+    """
+
+    clicked = pyqtSignal(int)
+
+    def __init__(self, label, parent=None):
+        super().__init__(parent)
+        self.label = label
+        self._pressed = None  # (row, column) under the mouse button
+
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = self.label
+        button.state = QStyle.State_Enabled
+        if self._pressed == (index.row(), index.column()):
+            button.state |= QStyle.State_Sunken
+        else:
+            button.state |= QStyle.State_Raised
+        QApplication.style().drawControl(QStyle.CE_PushButton, button, painter)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            self._pressed = (index.row(), index.column())
+            return True
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            pressed, self._pressed = self._pressed, None
+            if pressed == (index.row(), index.column()) and option.rect.contains(event.pos()):
+                self.clicked.emit(index.row())
+            return True
+        return False
@@ -0,0 +1,108 @@
+import csv
+import io
+import mmap
+import os
+import sys
+from array import array
+
+# Files smaller than this are parsed serially; starting the workers costs more than it saves
+PARALLEL_MIN_BYTES = 32 * 2 ** 20
+
+# Chunks handed out per worker, so a slow chunk doesn't hold the others up
+CHUNKS_PER_WORKER = 4
+
+
+def row_ranges(path, start, count):
+    """Split a file from start into about count byte ranges, each ending at a line break."""
+    size = os.path.getsize(path)
+    step = max((size - start) // count, 1)
+    ranges = []
+    with open(path, "rb") as f:
+        while start < size:
+            f.seek(min(start + step, size))
+            f.readline()  # On to the end of the row the cut fell in
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_range(path, start, end, field_count, key_index, min_length):
+    """Parse the rows between two line breaks of a CSV file (in a worker process).
+
+    Rows come back a column at a time, which pickles far smaller and loads
+    far faster than row lists: the key column as a list, every other column
+    as (distinct values, array of indexes into them). Rows shorter than
+    min_length are returned separately, as rows.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    keys = []
+    encodings = [{} for _ in range(field_count)]  # value -> index, per column
+    codes = [array('I') for _ in range(field_count)]
+    skipped = []
+    for row in csv.reader(io.StringIO(data.decode("utf-8"), newline='')):
+        if not row:
+            continue
+        if len(row) < min_length:
+            skipped.append(row)
+            continue
+        for index in range(field_count):
+            value = row[index]
+            if index == key_index:
+                keys.append(value)
+                continue
+            encoding = encodings[index]
+            code = encoding.get(value)
+            if code is None:
+                code = encoding[value] = len(encoding)
+            codes[index].append(code)
+    columns = [None if index == key_index else (list(encodings[index]), codes[index]) for index in range(field_count)]
+    return keys, columns, skipped
+
+
+def read_rows(path, field_count, key_index, min_length, interned=(), workers=None):
+    """Parse a CSV file on a pool of worker processes.
+
+    Returns (header, rows by key, skipped rows) exactly as a serial pass over
+    the file would find them: rows cut to field_count fields, rows shorter
+    than min_length skipped, a later row with a repeated key replacing the
+    earlier one in its place. Values of the columns in interned are interned.
+    Returns None if the file should be parsed serially instead: it is small,
+    there is one CPU, rows may be shorter than field_count, or it has quoted
+    fields (a line break inside quotes is not the end of a row).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or min_length < field_count or os.path.getsize(path) < PARALLEL_MIN_BYTES:
+        return None
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data.find(b'"') != -1:
+            return None
+        header_end = data.find(b"\n") + 1
+        if header_end == 0:
+            return None
+        header = next(csv.reader([data[:header_end].decode("utf-8")]), [])
+
+    from concurrent.futures import ProcessPoolExecutor  # Pulls in multiprocessing; only needed for large files
+    ranges = row_ranges(path, header_end, workers * CHUNKS_PER_WORKER)
+    rows = {}
+    skipped = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(parse_range, [path] * len(ranges), [start for start, end in ranges],
+                               [end for start, end in ranges], [field_count] * len(ranges),
+                               [key_index] * len(ranges), [min_length] * len(ranges))
+        for keys, columns, chunk_skipped in results:
+            decoded = []
+            for index, column in enumerate(columns):
+                if index == key_index:
+                    decoded.append(keys)
+                    continue
+                values, codes = column
+                if index in interned:
+                    values = [sys.intern(value) for value in values]
+                decoded.append(map(values.__getitem__, codes))
+            rows.update(zip(keys, map(list, zip(*decoded))))
+            skipped.extend(chunk_skipped)
+    return header, rows, skipped
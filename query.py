@@ -0,0 +1,220 @@
+"""Compact multi-field query syntax for searching students.
+
+A query is a list of terms, all of which must match:
+
+    year:2 course:BSCS gender:f last:lee
+
+Terms are field:value pairs, or bare words matched against the first name,
+last name and ID. Terms can be combined with AND (also implied between
+terms), OR and NOT (or a leading '-'), and grouped with parentheses:
+
+    (course:bscs OR course:bsit) -gender:m year:2..3
+
+Values match the way the simple search does (contains, or prefix for
+gender), unless written as:
+
+    last:=lee       exact match
+    last:le*        prefix match
+    year:2..3       inclusive range (Year Level)
+    year:>=2        comparison: >, >=, <, <= (Year Level)
+
+Values containing spaces can be quoted: last:"de la cruz". Matching is
+case-insensitive. compile_query() parses a query once into a predicate
+that takes a student row.
+"""
+import functools
+import re
+
+# Field names accepted in queries, mapped to the student column they search
+FIELD_ALIASES = {
+    'first': 'First Name',
+    'middle': 'Middle Initial',
+    'mi': 'Middle Initial',
+    'last': 'Last Name',
+    'id': 'ID',
+    'year': 'Year Level',
+    'gender': 'Gender',
+    'course': 'Course Code',
+    'status': 'Status',
+}
+
+# Fields matched by bare words
+DEFAULT_FIELDS = ['First Name', 'Last Name', 'ID']
+
+FIELD_INDEX = {
+    'First Name': 0,
+    'Middle Initial': 1,
+    'Last Name': 2,
+    'ID': 3,
+    'Year Level': 4,
+    'Gender': 5,
+    'Course Code': 6,
+}
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(\()|(\))|("(?:[^"]*)"|[^\s()"]+(?:"[^"]*")?))')
+RANGE_PATTERN = re.compile(r'^(\d+)\.\.(\d+)$')
+COMPARISON_PATTERN = re.compile(r'^(>=|<=|>|<)(\d+)$')
+
+
+class QueryError(ValueError):
+    """Raised when a query cannot be parsed."""
+
+
+def tokenize(text):
+    """Split a query into parentheses and words (quoted values stay whole); a '-' before '(' becomes NOT."""
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None or match.end() == position:
+            raise QueryError(f"Unexpected character at position {position}: {text[position]!r}")
+        token = match.group(match.lastindex)
+        if token == '-' and text.startswith('(', match.end()):
+            token = 'NOT'  # '-' before a group negates it, as before a term
+        tokens.append(token)
+        position = match.end()
+        while position < len(text) and text[position].isspace():
+            position += 1
+    return tokens
+
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+def _field_value(row, field):
+    if field == 'Status':
+        return "enrolled" if row[6].strip().lower() != "none" else "unenrolled"
+    return row[FIELD_INDEX[field]].lower()
+
+
+def _as_number(value):
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def compile_term(field, value):
+    """Compile one field:value term into a predicate."""
+    value = _unquote(value).lower()
+
+    if field == 'Year Level':
+        match = RANGE_PATTERN.match(value)
+        if match:
+            low, high = int(match.group(1)), int(match.group(2))
+
+            def in_range(row):
+                number = _as_number(row[4])
+                return number is not None and low <= number <= high
+            return in_range
+        match = COMPARISON_PATTERN.match(value)
+        if match:
+            operator, bound = match.group(1), int(match.group(2))
+            compare = {'>': int.__gt__, '>=': int.__ge__, '<': int.__lt__, '<=': int.__le__}[operator]
+
+            def compared(row):
+                number = _as_number(row[4])
+                return number is not None and compare(number, bound)
+            return compared
+
+    if value.startswith('='):
+        exact = _unquote(value[1:])
+        return lambda row: _field_value(row, field) == exact
+    if value.endswith('*'):
+        prefix = _unquote(value[:-1])
+        return lambda row: _field_value(row, field).startswith(prefix)
+    if field in ('Gender', 'Status'):
+        # Same as the simple search: 'f' matches Female, 'un' matches Unenrolled
+        return lambda row: _field_value(row, field).startswith(value)
+    return lambda row: value in _field_value(row, field)
+
+
+class _Parser:
+    """Recursive-descent parser producing predicates over student rows."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        if not self.tokens:
+            raise QueryError("Empty query.")
+        predicate = self.parse_or()
+        if self.peek() is not None:
+            raise QueryError(f"Unexpected {self.peek()!r}.")
+        return predicate
+
+    def parse_or(self):
+        terms = [self.parse_and()]
+        while self.peek() is not None and self.peek().lower() == 'or':
+            self.take()
+            terms.append(self.parse_and())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda row: any(term(row) for term in terms)
+
+    def parse_and(self):
+        terms = [self.parse_not()]
+        while self.peek() is not None and self.peek() != ')' and self.peek().lower() != 'or':
+            if self.peek().lower() == 'and':
+                self.take()
+            terms.append(self.parse_not())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda row: all(term(row) for term in terms)
+
+    def parse_not(self):
+        token = self.peek()
+        if token is None:
+            raise QueryError("Query ends too early.")
+        if token.lower() == 'not':
+            self.take()
+            term = self.parse_not()
+            return lambda row: not term(row)
+        if token.startswith('-') and len(token) > 1:
+            self.tokens[self.position] = token[1:]
+            term = self.parse_atom()
+            return lambda row: not term(row)
+        return self.parse_atom()
+
+    def parse_atom(self):
+        token = self.take()
+        if token is None:
+            raise QueryError("Query ends too early.")
+        if token == '(':
+            predicate = self.parse_or()
+            if self.take() != ')':
+                raise QueryError("Missing ')'.")
+            return predicate
+        if token == ')' or token.lower() in ('and', 'or'):
+            raise QueryError(f"Unexpected {token!r}.")
+
+        name, separator, value = token.partition(':')
+        if separator and not name.startswith('"'):
+            field = FIELD_ALIASES.get(name.lower())
+            if field is None:
+                raise QueryError(f"Unknown field {name!r}; expected one of {', '.join(FIELD_ALIASES)}.")
+            if not value:
+                raise QueryError(f"Missing value for {name!r}.")
+            return compile_term(field, value)
+
+        terms = [compile_term(field, token) for field in DEFAULT_FIELDS]
+        return lambda row: any(term(row) for term in terms)
+
+
+@functools.lru_cache(maxsize=64)
+def compile_query(text):
+    """Parse a query into a predicate over student rows; raises QueryError."""
+    return _Parser(tokenize(text)).parse()
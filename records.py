@@ -0,0 +1,105 @@
+import csv
+import sys
+from facets import student_status
+from validation import COURSE_VALIDATOR, student_validator
+
+
+class ValidationError(ValueError):
+    """Raised when a row breaks the validation rules; errors lists every reason."""
+
+    def __init__(self, errors):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+def with_status(rows):
+    """Return student rows with their 'Status' (Enrolled/Unenrolled) appended."""
+    students_data = []
+    for row in rows:
+        if len(row) >= 7:  # Check if the row has at least 7 elements
+            students_data.append(row[:7] + [student_status(row)])
+        else:
+            # Rows without a course code can't be given a status, so skip them
+            print(f"Skipping row due to insufficient data: {row}", file=sys.stderr)
+    return students_data
+
+
+def add_student(students, courses, row):
+    """Validate a new student (its course must exist) and add it."""
+    errors = student_validator(courses.keys()).errors(row, {'ID': students.is_duplicate_id})
+    if errors:
+        raise ValidationError(errors)
+    students.add(row)
+
+
+def update_student(students, courses, id_value, row):
+    """Validate a student's new data (its course must exist) and replace the row stored under id_value."""
+    if id_value not in students:
+        raise KeyError(f"Student {id_value} not found.")
+    taken = {'ID': lambda new_id: new_id != id_value and new_id in students}
+    errors = student_validator(courses.keys()).errors(row, taken)
+    if errors:
+        raise ValidationError(errors)
+    students.update(id_value, row)
+
+
+def delete_student(students, id_value):
+    """Delete a student."""
+    if id_value not in students:
+        raise KeyError(f"Student {id_value} not found.")
+    students.delete(id_value)
+
+
+def add_course(courses, row):
+    """Validate a new course and add it."""
+    errors = COURSE_VALIDATOR.errors(row, {'Course Code': courses.__contains__, 'Course Name': courses.has_name})
+    if errors:
+        raise ValidationError(errors)
+    courses.add(row)
+
+
+def update_course(students, courses, course_code, row):
+    """Validate a course's new data, replace it and move its students if the code changed."""
+    if course_code not in courses:
+        raise KeyError(f"Course {course_code} not found.")
+    # Compare with every other course (the course being updated is skipped)
+    taken = {
+        'Course Code': lambda code: code != course_code and code in courses,
+        'Course Name': lambda name: courses.has_name(name, exclude_code=course_code),
+    }
+    errors = COURSE_VALIDATOR.errors(row, taken)
+    if errors:
+        raise ValidationError(errors)
+    courses.update(course_code, row)
+    if row[0] != course_code:
+        students.rename_course(course_code, row[0])
+
+
+def delete_course(students, courses, course_code):
+    """Delete a course, setting the course of its students to "None" first."""
+    if course_code not in courses:
+        raise KeyError(f"Course {course_code} not found.")
+    # Unenroll first; the SQLite backend would otherwise null the students behind our back
+    students.unenroll(course_code)
+    courses.delete(course_code)
+
+
+def enrollment_counts(students, courses):
+    """Return {course code: number of students enrolled}, including "None"."""
+    counts = {course_code: len(students.roster(course_code)) for course_code in courses.keys()}
+    counts["None"] = len(students.roster("None"))
+    return counts
+
+
+def integrity_errors(students, courses):
+    """Check every stored student against the rules; return (ID, message) for each problem."""
+    rows = students.all()
+    errors = student_validator(courses.keys()).batch_errors(rows)
+    return [(row[3], message) for row, row_errors in zip(rows, errors) for message in row_errors]
+
+
+def export_csv(rows, fields, f):
+    """Write rows under a header line to an open text file."""
+    writer = csv.writer(f)
+    writer.writerow(fields)
+    writer.writerows(rows)
@@ -0,0 +1,93 @@
+import argparse
+import csv
+import os
+import random
+import string
+from store import STUDENT_FIELDS, COURSE_FIELDS
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William', 'Elizabeth',
+               'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+               'Hussam', 'Li', 'Ming', 'Maria Clara', 'Jose', 'Ana', 'Juan Carlos', 'Aisha', 'Omar', 'Mei']
+LAST_NAMES = ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+              'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Jackson', 'Martin',
+              'Bansao', 'Chen', 'Dela Cruz', 'Santos', 'Reyes', 'Cruz', 'Bautista', 'Ocampo', 'Tan', 'Lim']
+SUBJECTS = ['Computer Science', 'Information Technology', 'Civil Engineering', 'Mathematics', 'Biology',
+            'Chemistry', 'Physics', 'Accountancy', 'Nursing', 'Psychology', 'Economics', 'Statistics']
+
+# Share of generated students not enrolled in any course
+UNENROLLED_SHARE = 0.05
+
+
+def course_code(index):
+    """Return the index-th generated course code: BSA, BSB, ..., BSZ, BSBA, ..."""
+    letters = ''
+    while True:
+        index, remainder = divmod(index, 26)
+        letters = string.ascii_uppercase[remainder] + letters
+        if index == 0:
+            return 'BS' + letters
+
+
+def student_id(index):
+    """Return the index-th generated student ID (2000-0000, 2000-0001, ...)."""
+    year, number = divmod(index, 10000)
+    return f"{2000 + year:04d}-{number:04d}"
+
+
+def generate_courses(num_courses):
+    """Return num_courses course rows."""
+    courses = []
+    for index in range(num_courses):
+        subject = SUBJECTS[index % len(SUBJECTS)]
+        # Course names must be unique; later rounds of subjects get a number
+        name = f"BS {subject}" if index < len(SUBJECTS) else f"BS {subject} {index // len(SUBJECTS) + 1}"
+        courses.append([course_code(index), name])
+    return courses
+
+
+def generate_students(num_students, course_codes, seed=0):
+    """Yield num_students valid student rows, the same ones for the same arguments."""
+    rng = random.Random(seed)
+    for index in range(num_students):
+        enrolled = course_codes and rng.random() >= UNENROLLED_SHARE
+        yield [
+            rng.choice(FIRST_NAMES),
+            rng.choice(string.ascii_uppercase) + '.',
+            rng.choice(LAST_NAMES),
+            student_id(index),
+            str(rng.randint(1, 4)),
+            rng.choice(['Male', 'Female']),
+            rng.choice(course_codes) if enrolled else 'None',
+        ]
+
+
+def write_roster(directory, num_students, num_courses, seed=0):
+    """Write students.csv and courses.csv for a generated roster; return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    student_path = os.path.join(directory, 'students.csv')
+    course_path = os.path.join(directory, 'courses.csv')
+    courses = generate_courses(num_courses)
+    with open(course_path, "w", newline='', encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(COURSE_FIELDS)
+        writer.writerows(courses)
+    with open(student_path, "w", newline='', encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(STUDENT_FIELDS)
+        writer.writerows(generate_students(num_students, [row[0] for row in courses], seed))
+    return student_path, course_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic roster.")
+    parser.add_argument('directory')
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--courses', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    for path in write_roster(args.directory, args.students, args.courses, args.seed):
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
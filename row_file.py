@@ -0,0 +1,182 @@
+import bisect
+import csv
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from file_lock import keep_mode
+from instrumentation import count, span
+from store import file_stamp
+
+# Start of a row index file: magic, then the file_stamp() of the CSV file it indexes
+INDEX_HEADER = struct.Struct('<4sQQQ')
+INDEX_MAGIC = b'ROW1'
+
+
+class RowFile:
+    """Random access to the rows of a CSV file without parsing it.
+
+    The file is memory-mapped and indexed by the byte offset each row starts
+    at. The index is kept next to the file (the '.rows' file) and used again
+    for as long as the file's size, modification time and inode match, so
+    after the first scan a row is found by position or key without reading
+    the rows before it. raw() hands out rows as memoryview slices of the map,
+    copying nothing; row() parses just the one row asked for.
+
+    Positions count the non-blank rows after the header. Only the file is
+    read: changes still in a store's journal are not part of it.
+    """
+
+    def __init__(self, path, key_index, field_count, min_length, lock=None):
+        self.path = path
+        self.index_path = path + '.rows'
+        self.key_index = key_index
+        self.field_count = field_count
+        self.min_length = min_length
+        self._map = None
+        self._view = None
+        with open(path, "rb") as f:
+            if lock is not None:
+                with lock:  # Nobody is halfway through appending while the file is measured
+                    stamp = file_stamp(f.fileno())
+            else:
+                stamp = file_stamp(f.fileno())
+            if stamp[1]:
+                self._map = mmap.mmap(f.fileno(), stamp[1], access=mmap.ACCESS_READ)
+                self._view = memoryview(self._map)
+        self.starts = self._load_index(stamp)
+        if self.starts is None:
+            with span('rows.index', 'io', path=path) as timing:
+                self.starts = self._scan()
+                timing.set(rows=len(self))
+            self._save_index(stamp)
+
+    def _load_index(self, stamp):
+        """Return the saved row offsets if they were taken from this version of the file, else None."""
+        try:
+            with open(self.index_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < INDEX_HEADER.size or data[:INDEX_HEADER.size] != INDEX_HEADER.pack(INDEX_MAGIC, *stamp):
+            return None
+        starts = array('Q')
+        starts.frombytes(data[INDEX_HEADER.size:])
+        if sys.byteorder != 'little':
+            starts.byteswap()
+        count('row index hits')
+        return starts
+
+    def _save_index(self, stamp):
+        """Write the row offsets next to the file; a file that can't be written is simply rebuilt next time."""
+        starts = array('Q', self.starts)
+        if sys.byteorder != 'little':
+            starts.byteswap()
+        directory, name = os.path.split(os.path.abspath(self.index_path))
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=name + '.', suffix='.tmp')
+        except OSError:
+            return
+        try:
+            keep_mode(fd, self.index_path)
+            with os.fdopen(fd, "wb") as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, *stamp))
+                f.write(starts.tobytes())
+            os.replace(temp_path, self.index_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def _scan(self):
+        """Return the start offset of every non-blank row (the header first), then the end of the file."""
+        starts = array('Q')
+        data = self._map
+        if data is None:
+            starts.append(0)
+            return starts
+        size = len(data)
+        quoted = data.find(b'"') != -1
+        start = 0
+        while start < size:
+            end = data.find(b"\n", start) + 1 or size
+            if quoted:
+                # A line break inside quotes does not end the row
+                while data[start:end].count(b'"') % 2 and end < size:
+                    end = data.find(b"\n", end) + 1 or size
+            if end - start > 2 or data[start:end].strip(b"\r\n"):  # The CSV reader skips blank lines
+                starts.append(start)
+            start = end
+        starts.append(size)
+        return starts
+
+    def __len__(self):
+        return max(len(self.starts) - 2, 0)
+
+    def raw(self, position):
+        """Return the bytes of the row at position, without its line break, as a view into the file."""
+        if not 0 <= position < len(self):
+            raise IndexError(f"Row {position} is out of range.")
+        start, end = self.starts[position + 1], self.starts[position + 2]
+        while end > start and self._map[end - 1] in b"\r\n":
+            end -= 1
+        return self._view[start:end]
+
+    def row(self, position):
+        """Return the fields of the row at position."""
+        return self._fields(self.raw(position))
+
+    def header(self):
+        """Return the header row of the file."""
+        if len(self.starts) < 2:
+            return []
+        return self._fields(self._view[self.starts[0]:self.starts[1]])
+
+    def _fields(self, raw):
+        return next(csv.reader([bytes(raw).decode("utf-8")]), [])[:self.field_count]
+
+    def find(self, key):
+        """Return the position of the row with key, or None; the last one wins, as when the file is loaded.
+
+        The map is searched for the key's bytes from the end, and only rows
+        holding them are parsed.
+        """
+        if self._map is None:
+            return None
+        needle = key.encode("utf-8")
+        first, end = self.starts[1] if len(self.starts) > 1 else 0, self.starts[-1]
+        while True:
+            hit = self._map.rfind(needle, first, end)
+            if hit == -1:
+                return None
+            position = bisect.bisect_right(self.starts, hit) - 2
+            row = self.row(position)
+            if len(row) >= self.min_length and row[self.key_index] == key:
+                return position
+            end = self.starts[position + 1]  # Nothing else in this row can be its key
+
+    def get(self, key):
+        """Return the fields of the row with key, or None."""
+        position = self.find(key)
+        return None if position is None else self.row(position)
+
+    def close(self):
+        if self._map is None:
+            return
+        view, data = self._view, self._map
+        self._view = self._map = None
+        try:
+            view.release()
+            data.close()
+        except BufferError:
+            pass  # Rows from raw() still point into the map; it is unmapped once they are gone
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
@@ -0,0 +1,127 @@
+from events import INSERTED, CHANGED, REMOVED
+
+# Length of the n-grams used to narrow down substring searches
+GRAM_LENGTH = 3
+
+
+def grams(value):
+    """Return the set of n-grams in value."""
+    return {value[i:i + GRAM_LENGTH] for i in range(len(value) - GRAM_LENGTH + 1)}
+
+
+class SubstringIndex:
+    """Inverted n-gram index answering case-insensitive "contains" queries on one field.
+
+    Each distinct (lowercased) value is indexed once, so fields with many
+    repeated values stay small. A query of GRAM_LENGTH characters or more
+    only looks at values sharing all of its n-grams; shorter queries check
+    each distinct value.
+    """
+
+    def __init__(self):
+        self.keys_by_value = {}  # lowercased value -> set of row keys
+        self.values_by_gram = {}  # n-gram -> set of lowercased values containing it
+
+    def add(self, key, value):
+        """Index value for the row with key; return the lowercased value."""
+        value = value.lower()
+        keys = self.keys_by_value.get(value)
+        if keys is None:
+            keys = self.keys_by_value[value] = set()
+            for gram in grams(value):
+                self.values_by_gram.setdefault(gram, set()).add(value)
+        keys.add(key)
+        return value
+
+    def remove(self, key, value):
+        """Stop indexing value for the row with key."""
+        keys = self.keys_by_value.get(value)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del self.keys_by_value[value]
+            for gram in grams(value):
+                values = self.values_by_gram[gram]
+                values.discard(value)
+                if not values:
+                    del self.values_by_gram[gram]
+
+    def search(self, query):
+        """Return the keys of every row whose value contains query."""
+        query = query.lower()
+        if len(query) < GRAM_LENGTH:
+            candidates = self.keys_by_value
+        else:
+            postings = []
+            for gram in grams(query):
+                values = self.values_by_gram.get(gram)
+                if values is None:
+                    return set()
+                postings.append(values)
+            postings.sort(key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        keys = set()
+        for value in candidates:
+            if query in value:
+                keys |= self.keys_by_value[value]
+        return keys
+
+
+class SearchIndex:
+    """Substring indexes over several fields of a store, kept up to date from its change events."""
+
+    def __init__(self, fields, key_index, indexed_fields):
+        self.key_index = key_index
+        self.columns = {field: fields.index(field) for field in indexed_fields}
+        self.indexes = {field: SubstringIndex() for field in indexed_fields}
+        self.entries = {}  # key -> (indexed lowercased values, insertion sequence)
+        self._next_sequence = 0
+
+    def __contains__(self, field):
+        return field in self.indexes
+
+    def build(self, rows):
+        """Index every row, in store order."""
+        for row in rows:
+            self._add(row[self.key_index], row)
+
+    def state(self):
+        """Return the contents of the index, for restore()."""
+        indexes = {field: (index.keys_by_value, index.values_by_gram) for field, index in self.indexes.items()}
+        return indexes, self.entries, self._next_sequence
+
+    def restore(self, state):
+        """Replace the contents of the index with a state() of an index over the same fields."""
+        indexes, self.entries, self._next_sequence = state
+        for field, (keys_by_value, values_by_gram) in indexes.items():
+            self.indexes[field].keys_by_value = keys_by_value
+            self.indexes[field].values_by_gram = values_by_gram
+
+    def _add(self, key, row, sequence=None):
+        if sequence is None:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+        values = tuple(self.indexes[field].add(key, row[column]) for field, column in self.columns.items())
+        self.entries[key] = (values, sequence)
+
+    def _remove(self, key):
+        values, sequence = self.entries.pop(key)
+        for index, value in zip(self.indexes.values(), values):
+            index.remove(key, value)
+        return sequence
+
+    def apply_change(self, change, key, row):
+        """Update the indexes for one store change event."""
+        if change == INSERTED:
+            self._add(key, row)
+        elif change == CHANGED:
+            # Keep the row's place in store order, even if its key changed
+            self._add(row[self.key_index], row, self._remove(key))
+        elif change == REMOVED:
+            self._remove(key)
+
+    def search(self, field, query):
+        """Return the keys of rows whose field contains query, in store order."""
+        keys = self.indexes[field].search(query)
+        return sorted(keys, key=lambda key: self.entries[key][1])
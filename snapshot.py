@@ -0,0 +1,111 @@
+import gc
+import hashlib
+import os
+import pickle
+import struct
+import tempfile
+
+# Start of a snapshot file: magic, the file_stamp() of the CSV file it was taken from, and where its contents table is
+HEADER = struct.Struct('<8sQQQQ')
+MAGIC = b'SNAPSHT1'
+
+# Directory under the user's local cache directory holding the snapshots
+SNAPSHOT_DIRECTORY = 'student-information-system'
+
+
+def snapshot_path(csv_path):
+    """Return where the snapshot of a CSV file is kept.
+
+    Loading a snapshot unpickles it, and anyone able to write a pickle can
+    run code in the process loading it. The CSV files may sit on a drive
+    shared between workstations, so snapshots are kept in the user's own
+    local cache directory instead, named after the CSV file's full path.
+    """
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    digest = hashlib.sha256(os.path.abspath(csv_path).encode("utf-8")).hexdigest()[:32]
+    return os.path.join(base, SNAPSHOT_DIRECTORY, f"{os.path.basename(csv_path)}.{digest}.snapshot")
+
+
+def _owned(f):
+    """Check that an open file belongs to this user and nobody else can write to it (where the OS tells)."""
+    if not hasattr(os, 'getuid'):
+        return True  # Windows: the per-user cache directory is private already
+    stat = os.fstat(f.fileno())
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+
+class Snapshot:
+    """A binary copy of a parsed CSV file and of the indexes built over it (see snapshot_path()).
+
+    Loading pickled rows and indexes is many times faster than parsing the
+    CSV text and building the indexes again. Each section is pickled on its
+    own, so a large one can be left on disk until it is first needed. A
+    snapshot belongs to one version of the CSV file: its sections are only
+    loaded while the file's stamp matches the one they were taken from, so a
+    file changed by anything else is simply parsed again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, stamp, sections):
+        """Replace the snapshot with sections ({name: picklable value}) taken from the CSV file version stamp."""
+        directory, name = os.path.split(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(bytes(HEADER.size))  # Filled in last, once the contents table is written
+                offsets = {}
+                for section, value in sections.items():
+                    offsets[section] = f.tell()
+                    pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+                contents = f.tell()
+                pickle.dump(offsets, f, pickle.HIGHEST_PROTOCOL)
+                f.seek(0)
+                f.write(HEADER.pack(MAGIC, *stamp, contents))
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def _offsets(self, f, stamp):
+        """Return {section: offset} of an open snapshot taken from the CSV file version stamp, or None."""
+        if stamp is None or not _owned(f):
+            return None
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        magic, inode, size, mtime, contents = HEADER.unpack(header)
+        if magic != MAGIC or (inode, size, mtime) != tuple(stamp):
+            return None
+        f.seek(contents)
+        return pickle.load(f)
+
+    def has(self, stamp, section):
+        """Check if the snapshot holds section for the CSV file version stamp."""
+        try:
+            with open(self.path, "rb") as f:
+                offsets = self._offsets(f, stamp)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False
+        return offsets is not None and section in offsets
+
+    def load(self, stamp, section):
+        """Return a section taken from the CSV file version stamp, or None if the snapshot has no such section."""
+        try:
+            with open(self.path, "rb") as f:
+                offsets = self._offsets(f, stamp)
+                if offsets is None or section not in offsets:
+                    return None
+                f.seek(offsets[section])
+                collecting = gc.isenabled()
+                gc.disable()  # Nothing being loaded is garbage; collecting as millions of objects appear only costs time
+                try:
+                    return pickle.load(f)
+                finally:
+                    if collecting:
+                        gc.enable()
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
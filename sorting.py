@@ -0,0 +1,114 @@
+import bisect
+from collections import OrderedDict
+from events import INSERTED, CHANGED, REMOVED
+from facets import student_status
+
+# Number of sort orders whose permutations are kept up to date
+MAX_CACHED_SORTS = 4
+
+
+class Descending:
+    """Wraps a value so that it sorts in reverse order."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def student_sort_value(row, column):
+    """Return the value a student column sorts by."""
+    if column == 7:
+        return student_status(row)
+    value = row[column]
+    if column == 4:
+        # Year levels sort numerically, anything else after them
+        return (0, int(value), '') if value.isdigit() else (1, 0, value.lower())
+    return value.lower()
+
+
+def course_sort_value(row, column):
+    """Return the value a course column sorts by."""
+    return row[column].lower()
+
+
+def make_sort_key(spec, value_of):
+    """Return a key function for a sort spec: a tuple of (column, descending) pairs."""
+    def sort_key(row):
+        return tuple(Descending(value_of(row, column)) if descending else value_of(row, column)
+                     for column, descending in spec)
+    return sort_key
+
+
+class SortCache:
+    """Sorted permutations of a store's rows, one per sort spec, patched on every change.
+
+    Each permutation is a list of (sort key, sequence, row key) entries, where
+    sequence is the row's place in store order; ties therefore keep store order
+    and the sort is stable. Changes move single entries with bisect instead of
+    sorting again. Only the MAX_CACHED_SORTS most recently used specs are kept.
+    """
+
+    def __init__(self, key_index, value_of, max_sorts=MAX_CACHED_SORTS):
+        self.key_index = key_index
+        self.value_of = value_of
+        self.max_sorts = max_sorts
+        self.sequence = {}  # row key -> place in store order
+        self._next_sequence = 0
+        self.sorts = OrderedDict()  # spec -> (sort key function, entries, row key -> entry)
+
+    def build(self, rows):
+        """Record the store order of every row and drop cached permutations."""
+        self.sequence = {}
+        self.sorts.clear()
+        for sequence, row in enumerate(rows):
+            self.sequence[row[self.key_index]] = sequence
+        self._next_sequence = len(self.sequence)
+
+    def row_key(self, spec):
+        """Return a key function giving the same order as sorted_keys(spec)."""
+        sort_key = make_sort_key(spec, self.value_of)
+        return lambda row: (sort_key(row), self.sequence.get(row[self.key_index], self._next_sequence))
+
+    def sorted_keys(self, spec, load_rows):
+        """Return every row key in spec order; load_rows() is called only on a cache miss."""
+        spec = tuple(spec)
+        if spec in self.sorts:
+            self.sorts.move_to_end(spec)
+        else:
+            sort_key = make_sort_key(spec, self.value_of)
+            entries = [(sort_key(row), self.sequence[row[self.key_index]], row[self.key_index]) for row in load_rows()]
+            entries.sort()
+            self.sorts[spec] = (sort_key, entries, {entry[2]: entry for entry in entries})
+            if len(self.sorts) > self.max_sorts:
+                self.sorts.popitem(last=False)
+        return [entry[2] for entry in self.sorts[spec][1]]
+
+    def apply_change(self, change, key, row):
+        """Patch every cached permutation for one store change event."""
+        if change == INSERTED:
+            self.sequence[key] = self._next_sequence
+            self._next_sequence += 1
+        elif change == CHANGED:
+            new_key = row[self.key_index]
+            if new_key != key:
+                self.sequence[new_key] = self.sequence.pop(key)
+
+        for sort_key, entries, by_key in self.sorts.values():
+            if change in (CHANGED, REMOVED):
+                entry = by_key.pop(key)
+                del entries[bisect.bisect_left(entries, entry)]
+            if change in (INSERTED, CHANGED):
+                new_key = row[self.key_index]
+                entry = (sort_key(row), self.sequence[new_key], new_key)
+                bisect.insort(entries, entry)
+                by_key[new_key] = entry
+
+        if change == REMOVED:
+            del self.sequence[key]
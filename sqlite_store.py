@@ -0,0 +1,328 @@
+import csv
+import os
+import sqlite3
+import sys
+import threading
+from events import ChangeNotifier, INSERTED, CHANGED, REMOVED
+from instrumentation import span
+from query import compile_query
+from store import STUDENT_FIELDS, COURSE_FIELDS, STUDENT_DATABASE, COURSE_DATABASE, QUERY_CRITERIA, matches_search_criteria
+
+SQLITE_DATABASE = 'students.db'
+
+# Table columns in the same order as STUDENT_FIELDS / COURSE_FIELDS
+STUDENT_COLUMNS = ['first_name', 'middle_initial', 'last_name', 'id', 'year_level', 'gender', 'course_code']
+COURSE_COLUMNS = ['code', 'name']
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS courses (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_courses_name ON courses (name);
+
+CREATE TABLE IF NOT EXISTS students (
+    id TEXT PRIMARY KEY,
+    first_name TEXT NOT NULL,
+    middle_initial TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    year_level TEXT NOT NULL,
+    gender TEXT NOT NULL,
+    course_code TEXT REFERENCES courses (code) ON UPDATE CASCADE ON DELETE SET NULL
+);
+CREATE INDEX IF NOT EXISTS idx_students_course_code ON students (course_code);
+CREATE INDEX IF NOT EXISTS idx_students_last_name ON students (last_name);
+CREATE INDEX IF NOT EXISTS idx_students_year_level ON students (year_level);
+'''
+
+
+def connect(db_path=SQLITE_DATABASE):
+    """Open the SQLite database, creating the schema if needed."""
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.execute('PRAGMA journal_mode = WAL')  # Searches on worker threads don't block writes
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def import_csv(conn, student_csv=STUDENT_DATABASE, course_csv=COURSE_DATABASE):
+    """Copy the CSV databases into an empty SQLite database.
+
+    Students whose course is "None" or no longer exists are imported as not
+    enrolled in any course.
+    """
+    with open(course_csv, "r", newline='', encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # Skip header
+        courses = [row[:2] for row in reader if len(row) >= 2]
+
+    course_codes = {row[0] for row in courses}
+    students = []
+    with open(student_csv, "r", newline='', encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # Skip header
+        for row in reader:
+            if len(row) < len(STUDENT_FIELDS):
+                print(f"Skipping row due to insufficient data: {row}", file=sys.stderr)
+                continue
+            students.append(_to_db(row[:len(STUDENT_FIELDS)], course_codes))
+
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO courses (code, name) VALUES (?, ?)', courses)
+        conn.executemany(f'INSERT OR REPLACE INTO students ({", ".join(STUDENT_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         students)
+
+
+def open_sqlite_stores(db_path=SQLITE_DATABASE):
+    """Open the SQLite student and course stores, importing the CSVs on first use."""
+    is_new = not os.path.exists(db_path)
+    conn = connect(db_path)
+    if is_new:
+        import_csv(conn)
+    return SqliteStudentStore(conn), SqliteCourseStore(conn)
+
+
+def _to_db(row, course_codes=None):
+    """Convert a student row to table values ("None" course becomes NULL)."""
+    row = list(row)
+    if row[6] == "None" or (course_codes is not None and row[6] not in course_codes):
+        row[6] = None
+    return row
+
+
+def _from_db(row):
+    """Convert table values back to a student row."""
+    row = list(row)
+    if row[6] is None:
+        row[6] = "None"
+    return row
+
+
+def _is_foreign_key_error(error):
+    """Check if an IntegrityError is a FOREIGN KEY failure (a course that doesn't exist) rather than a key conflict."""
+    return 'FOREIGN KEY' in str(error)
+
+
+class SqliteStore(ChangeNotifier):
+    """Rows of one SQLite table, with the same interface as store.CsvStore."""
+
+    def __init__(self, conn, table, columns, fields, key_column):
+        self.conn = conn
+        self.table = table
+        self.columns = columns
+        self.fields = fields
+        self.key_column = key_column
+        self.header = list(fields)
+        self.listeners = []
+        self.db_path = conn.execute('PRAGMA database_list').fetchone()[2]
+        self._owner = threading.get_ident()
+        self._local = threading.local()
+        self._select = f'SELECT {", ".join(columns)} FROM {table}'
+
+    def _reader(self):
+        """Return a connection usable from the calling thread."""
+        if threading.get_ident() == self._owner:
+            return self.conn
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_path)
+        return conn
+
+    def _row(self, row):
+        return list(row)
+
+    def _values(self, row):
+        return list(row)
+
+    def _integrity_error(self, error, row):
+        """Return the KeyError to report for a row the table's constraints rejected."""
+        return KeyError(f"{self.fields[self.columns.index(self.key_column)]} {row[self.columns.index(self.key_column)]} already exists.")
+
+    def __len__(self):
+        return self.conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+    def __contains__(self, key):
+        return self.conn.execute(f'SELECT 1 FROM {self.table} WHERE {self.key_column} = ?', (key,)).fetchone() is not None
+
+    def all(self):
+        """Return every row in insertion order."""
+        with span('sqlite.all', 'io', table=self.table) as timing:
+            rows = [self._row(row) for row in self.conn.execute(f'{self._select} ORDER BY rowid')]
+            timing.set(rows=len(rows))
+        return rows
+
+    def keys(self):
+        """Return every key in insertion order."""
+        return [row[0] for row in self.conn.execute(f'SELECT {self.key_column} FROM {self.table} ORDER BY rowid')]
+
+    def get(self, key):
+        """Return the row stored under key, or None."""
+        row = self.conn.execute(f'{self._select} WHERE {self.key_column} = ?', (key,)).fetchone()
+        return self._row(row) if row is not None else None
+
+    def add(self, row):
+        """Insert a new row."""
+        key = row[self.columns.index(self.key_column)]
+        try:
+            with self.conn:
+                self.conn.execute(f'INSERT INTO {self.table} ({", ".join(self.columns)}) '
+                                  f'VALUES ({", ".join("?" * len(self.columns))})', self._values(row))
+        except sqlite3.IntegrityError as e:
+            raise self._integrity_error(e, row)
+        self._notify(INSERTED, key, list(row))
+
+    def add_many(self, rows):
+        """Insert several new rows in one transaction."""
+        rows = [list(row) for row in rows]
+        try:
+            with self.conn:
+                self.conn.executemany(f'INSERT INTO {self.table} ({", ".join(self.columns)}) '
+                                      f'VALUES ({", ".join("?" * len(self.columns))})', map(self._values, rows))
+        except sqlite3.IntegrityError as e:
+            if _is_foreign_key_error(e):
+                raise KeyError("Unknown course code in rows to add.")
+            raise KeyError(f"Duplicate {self.fields[self.columns.index(self.key_column)]} in rows to add.")
+        key_index = self.columns.index(self.key_column)
+        for row in rows:
+            self._notify(INSERTED, row[key_index], row)
+
+    def update(self, key, row):
+        """Replace the row stored under key."""
+        assignments = ", ".join(f'{column} = ?' for column in self.columns)
+        try:
+            with self.conn:
+                cursor = self.conn.execute(f'UPDATE {self.table} SET {assignments} WHERE {self.key_column} = ?',
+                                           self._values(row) + [key])
+        except sqlite3.IntegrityError as e:
+            raise self._integrity_error(e, row)
+        if cursor.rowcount == 0:
+            raise KeyError(f"{self.fields[self.columns.index(self.key_column)]} {key} not found.")
+        self._notify(CHANGED, key, list(row))
+
+    def delete(self, key):
+        """Remove the row stored under key."""
+        with self.conn:
+            cursor = self.conn.execute(f'DELETE FROM {self.table} WHERE {self.key_column} = ?', (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(f"{self.fields[self.columns.index(self.key_column)]} {key} not found.")
+        self._notify(REMOVED, key)
+
+    def save(self):
+        """Changes are committed as they are made; nothing to do."""
+
+    def compact(self, wait=True):
+        """SQLite needs no journal compaction; nothing to do."""
+
+    def refresh(self):
+        """Other connections' commits show up in the next query; nothing to do."""
+        return False
+
+    def restore_index(self, name, index):
+        """There are no snapshots to restore index from; build it from the rows."""
+        return False
+
+    def close(self):
+        """Commit and close the shared connection."""
+        try:
+            self.conn.commit()
+            self.conn.close()
+        except sqlite3.ProgrammingError:
+            pass  # Already closed by the other store
+
+
+class SqliteStudentStore(SqliteStore):
+    """Student rows keyed by ID."""
+
+    def __init__(self, conn):
+        super().__init__(conn, 'students', STUDENT_COLUMNS, STUDENT_FIELDS, 'id')
+
+    def _row(self, row):
+        return _from_db(row)
+
+    def _values(self, row):
+        return _to_db(row)
+
+    def _integrity_error(self, error, row):
+        if _is_foreign_key_error(error):
+            return KeyError(f"Unknown course code {row[6]}.")
+        return super()._integrity_error(error, row)
+
+    def is_duplicate_id(self, id_value):
+        """Check if the ID is already used by a student."""
+        return id_value in self
+
+    def matches(self, row, criteria, query):
+        """Check if a student matches the search criteria."""
+        return matches_search_criteria(row, criteria, query)
+
+    def search(self, criteria, query):
+        """Return every student matching the search criteria."""
+        with span('search', criteria=criteria) as timing:
+            rows = self._search(criteria, query)
+            timing.set(rows=len(rows))
+        return rows
+
+    def _search(self, criteria, query):
+        if criteria == QUERY_CRITERIA:
+            # Multi-field queries are evaluated in one pass over the rows
+            predicate = compile_query(query)
+            return [row for row in map(_from_db, self._reader().execute(f'{self._select} ORDER BY rowid')) if predicate(row)]
+        column = STUDENT_COLUMNS[STUDENT_FIELDS.index(criteria)]
+        value = f"COALESCE({column}, 'None')" if column == 'course_code' else column
+        if criteria == 'Gender':
+            # Prefix match, same as the CSV backend
+            condition, parameter = f'substr(lower({value}), 1, length(?)) = ?', (query, query)
+        else:
+            condition, parameter = f'instr(lower({value}), ?) > 0', (query,)
+        return [_from_db(row) for row in self._reader().execute(f'{self._select} WHERE {condition} ORDER BY rowid',
+                                                           tuple(p.lower() for p in parameter))]
+
+    def roster(self, course_code):
+        """Return the students enrolled in course_code."""
+        if course_code == "None":
+            return [_from_db(row) for row in self._reader().execute(f'{self._select} WHERE course_code IS NULL ORDER BY rowid')]
+        return [_from_db(row) for row in self._reader().execute(f'{self._select} WHERE course_code = ? ORDER BY rowid',
+                                                                (course_code,))]
+
+    def rename_course(self, old_code, new_code):
+        """Report the students moved from old_code to new_code.
+
+        The foreign key has already cascaded the rename when the course row
+        was updated, so this only sends the change events (and moves any
+        stragglers if foreign keys were off).
+        """
+        with self.conn:
+            self.conn.execute('UPDATE students SET course_code = ? WHERE course_code = ?', (new_code, old_code))
+        for row in self.roster(new_code):
+            self._notify(CHANGED, row[3], row)
+
+    def unenroll(self, course_code):
+        """Set the course of every student enrolled in course_code to "None"."""
+        affected = self.roster(course_code)
+        with self.conn:
+            self.conn.execute('UPDATE students SET course_code = NULL WHERE course_code = ?', (course_code,))
+        for row in affected:
+            row[6] = "None"
+            self._notify(CHANGED, row[3], row)
+
+
+class SqliteCourseStore(SqliteStore):
+    """Course rows keyed by Course Code."""
+
+    def __init__(self, conn):
+        super().__init__(conn, 'courses', COURSE_COLUMNS, COURSE_FIELDS, 'code')
+
+    def matches(self, row, criteria, query):
+        """Check if a course matches the search criteria."""
+        return query.lower() in row[COURSE_FIELDS.index(criteria)].lower()
+
+    def search(self, criteria, query):
+        """Return every course matching the search criteria."""
+        column = COURSE_COLUMNS[COURSE_FIELDS.index(criteria)]
+        return [list(row) for row in self._reader().execute(f'{self._select} WHERE instr(lower({column}), ?) > 0 ORDER BY rowid',
+                                                       (query.lower(),))]
+
+    def has_name(self, course_name, exclude_code=None):
+        """Check if another course already uses course_name."""
+        return self.conn.execute('SELECT 1 FROM courses WHERE name = ? AND code IS NOT ?',
+                                 (course_name, exclude_code)).fetchone() is not None
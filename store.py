@@ -0,0 +1,793 @@
+import csv
+import os
+import sys
+import tempfile
+import threading
+from events import ChangeNotifier, INSERTED, CHANGED, REMOVED
+from file_lock import FileLock, fsync_directory, keep_mode
+from instrumentation import count, span
+from journal import Journal, BackgroundJournal, ADD, UPDATE, DELETE
+import parallel_csv
+from query import compile_query
+from search_index import SearchIndex
+from snapshot import Snapshot, snapshot_path
+
+# Constants for student fields and database files
+STUDENT_FIELDS = ['First Name', 'Middle Initial', 'Last Name', 'ID', 'Year Level', 'Gender', 'Course Code']
+STUDENT_DATABASE = 'students.csv'
+COURSE_FIELDS = ['Course Code', 'Course Name']
+COURSE_DATABASE = 'courses.csv'
+
+# Search criteria taking a multi-field query (see query.py) instead of one field
+QUERY_CRITERIA = 'Query'
+SEARCH_CRITERIA = STUDENT_FIELDS + [QUERY_CRITERIA]
+
+# Number of journal records after which the journal is folded into the base CSV
+COMPACT_THRESHOLD = 1000
+
+# Parsed CSV files: absolute path -> (file_stamp(), header, rows by key) of the last version read or written
+_parse_cache = {}
+
+# Storage backends selectable at startup
+BACKEND_ENV = 'STUDENT_DB_BACKEND'
+BACKENDS = ['csv', 'sqlite']
+
+
+def get_field_index(criteria):
+    """Get the index of the field based on the criteria."""
+    return STUDENT_FIELDS.index(criteria)
+
+
+def matches_search_criteria(student_data, criteria, query):
+    """Check if a student matches the search criteria."""
+    if criteria == QUERY_CRITERIA:
+        # Compiled once per distinct query, then evaluated per row
+        return compile_query(query)(student_data)
+
+    return value_matches(criteria, student_data[get_field_index(criteria)], query)
+
+
+def value_matches(criteria, value, query):
+    """Check if one student field value matches the search criteria."""
+    data_value = value.lower()
+
+    if criteria == 'Gender':
+        # Check if the first character of the gender matches the query ('M' or 'F')
+        return data_value.startswith(query.lower())
+    else:
+        # Check if query is a substring of the specified criteria (case-insensitive)
+        return query.lower() in data_value
+
+
+def file_stamp(path):
+    """Return something that changes whenever the file (a path or an open descriptor) is replaced or written to."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def clear_parse_cache():
+    """Forget every parsed CSV file, so the next load parses from scratch."""
+    _parse_cache.clear()
+
+
+def open_stores(backend=None, journaled=True, lazy_index=False, background_writes=False, on_write_error=None):
+    """Open the student and course stores for the selected backend.
+
+    With lazy_index, CSV stores build their search index on the first search
+    instead of on load (for short-lived command-line runs). With
+    background_writes, journaled CSV stores write their journals on a worker
+    thread. Failures of those writes and of background compactions are
+    reported to on_write_error(exception) from the thread they happen on.
+    """
+    backend = backend or os.environ.get(BACKEND_ENV, 'csv')
+    if backend == 'csv':
+        options = dict(journaled=journaled, lazy_index=lazy_index, background_writes=background_writes,
+                       on_write_error=on_write_error)
+        return StudentStore(**options), CourseStore(**options)
+    if backend == 'sqlite':
+        from sqlite_store import open_sqlite_stores
+        return open_sqlite_stores()
+    raise ValueError(f"Unknown storage backend {backend!r}; expected one of {', '.join(BACKENDS)}.")
+
+
+class CsvStore(ChangeNotifier):
+    """Rows of a CSV file loaded once and kept in memory, keyed by one column.
+
+    In journaled mode, changes are appended to a journal next to the CSV file
+    instead of rewriting it; the journal is folded back into the CSV on a
+    background thread once it passes compact_threshold records, and on close().
+    With background_writes even the journal appends leave the caller's thread
+    (see journal.BackgroundJournal).
+
+    Several processes (registrar workstations on a shared drive) can keep the
+    same files open. Every write takes an advisory lock (the '.lock' file)
+    only for as long as one append or one file swap takes, and a full read
+    only while it opens the files; they are parsed after. Rewritten
+    files are written to a temporary file, synced and renamed over the old
+    one, so a crash never leaves a half-written CSV. A compaction rebuilds the
+    CSV from the files on disk, not from this process's rows, so it never
+    drops another process's changes. refresh() picks those changes up. Two
+    processes editing the same row at once: the change logged last wins.
+
+    Searches on the fields listed in indexed_fields go through an n-gram
+    SearchIndex that is built on load (or on the first search, if lazy_index)
+    and kept current from change events.
+
+    Values of the fields listed in interned_fields repeat from row to row
+    (year levels, course codes, common names); every row holding the same
+    value shares one interned string instead of its own copy, and searches
+    on those fields test each distinct value once. Rows stay plain lists, so
+    this roughly halves what the rows take (about 480 to 220 bytes per
+    student); the indexes built over them are not made any smaller.
+
+    close() leaves a Snapshot of the rows and of the indexes over them (in
+    the user's local cache directory), and so does a background compaction (of the rows
+    only). load() takes the rows from the snapshot instead of parsing the CSV
+    file if it was taken from the same version of the file; indexes kept by
+    other code are saved and restored through restore_index(). The search
+    index is loaded from the snapshot on the first search that needs it.
+    """
+
+    indexed_fields = []
+    interned_fields = []
+
+    def __init__(self, path, fields, key_index, min_length, journaled=False, compact_threshold=COMPACT_THRESHOLD,
+                 lazy_index=False, background_writes=False, on_write_error=None):
+        self.path = path
+        self.fields = fields
+        self.key_index = key_index
+        self.min_length = min_length
+        self.header = list(fields)
+        self.rows = {}  # key -> row, in file order (dicts keep insertion order)
+        self._interned = [fields.index(field) for field in self.interned_fields]
+        self.lock = FileLock(path + '.lock')  # held briefly around every read and write of the files
+        self.compact_lock = FileLock(path + '.compact.lock')  # held by the one process compacting
+        if not journaled:
+            self.journal = None
+        elif background_writes:
+            self.journal = BackgroundJournal(path, self.lock, on_write_error)
+        else:
+            self.journal = Journal(path, self.lock)
+        self.compact_threshold = compact_threshold
+        self.on_write_error = on_write_error
+        self._compactor = None
+        self._base_stamp = None  # file_stamp() of the CSV file the rows were read from
+        self.listeners = []
+        self.search_index = None
+        self.lazy_index = lazy_index
+        self.snapshot = Snapshot(snapshot_path(path))
+        self._snapshot_stamp = None  # file_stamp() of the CSV file whose snapshot holds exactly the rows, or None
+        self._snapshot_stale = False  # Whether that snapshot lacks an index built since
+        self._snapshot_states = {}  # index name -> state saved in that snapshot, until restored
+        self._snapshot_indexes = {}  # index name -> index saved in snapshots (see restore_index())
+        self._search_stamp = None  # file_stamp() of the CSV file whose snapshot the search index is loaded from
+        self._search_changes = None  # Changes to apply to the search index once loaded, or None if it is not to be
+        self._search_lock = threading.Lock()  # Held while the search index is made, which searches off the GUI thread can do
+        self.subscribe(self._update_indexes)
+        self.load()
+
+    def load(self):
+        """Read the CSV file (or its snapshot) into memory, replaying the journal on top of it."""
+        self.header, self.rows = self._read_rows(use_snapshot=True)
+        self.build_indexes()
+
+    def _read_base(self, use_snapshot=False, f=None):
+        """Read the CSV file; return its header, its rows by key and its file_stamp().
+
+        A file whose stamp matches the version last read or written in this
+        process is not parsed again. With use_snapshot, a snapshot of the same
+        version is loaded instead of parsing the file, and the index states
+        saved with it are kept for restore_index(). f is the file already
+        open, if the caller opened it; it is closed in any case.
+        """
+        if f is None:
+            f = open(self.path, "r", newline='', encoding="utf-8")
+        with f:
+            stamp = file_stamp(f.fileno())
+            cached = _parse_cache.get(os.path.abspath(self.path))
+            if cached is not None and cached[0] == stamp:
+                count('parse cache hits')
+                return list(cached[1]), dict(cached[2]), stamp
+            if use_snapshot:
+                with span('snapshot.read', 'io', path=self.snapshot.path) as timing:
+                    saved = self.snapshot.load(stamp, 'store')
+                    timing.set(hit=saved is not None)
+                if saved is not None:
+                    header, rows, self._snapshot_states = saved
+                    self._snapshot_stamp = stamp
+                    self._cache_base(stamp, header, rows)
+                    return list(header), dict(rows), stamp
+            with span('csv.read', 'io', path=self.path) as timing:
+                # Large files are parsed on a process pool; the file must still be the one opened here
+                parsed = parallel_csv.read_rows(self.path, len(self.fields), self.key_index, self.min_length,
+                                                self._interned)
+                if parsed is not None and file_stamp(self.path) == stamp:
+                    header, rows, skipped = parsed
+                    for row in skipped:
+                        print(f"Skipping row due to insufficient data: {row}", file=sys.stderr)
+                    timing.set(parallel=True)
+                else:
+                    header, rows = self._parse(f)
+                timing.set(rows=len(rows))
+        self._cache_base(stamp, header, rows)
+        return header, dict(rows), stamp
+
+    def _parse(self, f):
+        """Parse an open CSV file in this process; return its header and its rows by key."""
+        rows = {}
+        reader = csv.reader(f)
+        header = next(reader, self.header)
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < self.min_length:
+                # Rows that don't have enough elements can't be keyed, so skip them
+                print(f"Skipping row due to insufficient data: {row}", file=sys.stderr)
+                continue
+            del row[len(self.fields):]  # The reader's list is ours to trim
+            self._intern(row)
+            rows[row[self.key_index]] = row
+        return header, rows
+
+    def _cache_base(self, stamp, header, rows):
+        """Remember rows (by key) as the parsed contents of the CSV file version stamp."""
+        _parse_cache[os.path.abspath(self.path)] = (stamp, list(header), rows)
+
+    def _read_rows(self, use_snapshot=False):
+        """Read the CSV file and replay the journal; return the header and the rows.
+
+        The lock is only held while the files are opened. They are parsed
+        after it is let go, as they were at that moment: whatever other
+        processes append or swap in meanwhile is picked up by refresh().
+        """
+        with self.lock:
+            f = open(self.path, "r", newline='', encoding="utf-8")
+            try:
+                log = self.journal.open_log() if self.journal is not None else (None, 0)
+            except BaseException:
+                f.close()
+                raise
+        try:
+            header, rows, self._base_stamp = self._read_base(use_snapshot, f)
+            if self.journal is not None:
+                with span('journal.replay', 'io', path=self.journal.path):
+                    for op, key, row in self.journal.replay(log):
+                        rows = self._apply(rows, op, key, row)
+                        self._forget_snapshot()  # The saved indexes are of the file without the journal
+        finally:
+            if log[0] is not None:
+                log[0].close()
+        return header, rows
+
+    def _forget_snapshot(self):
+        """Note that the rows have moved on from the snapshot they were loaded from."""
+        self._snapshot_stamp = None
+        self._snapshot_states = {}
+
+    def restore_index(self, name, index):
+        """Save index in this store's snapshots, and restore it from the snapshot the rows were loaded from.
+
+        index has state() and restore(state) methods and is kept current from
+        this store's change events; call this before any change is made.
+        Return whether the index was restored; if not, build it from the rows.
+        """
+        self._snapshot_indexes[name] = index
+        state = self._snapshot_states.pop(name, None)
+        if state is None:
+            self._snapshot_stale = self._snapshot_stamp is not None
+            return False
+        with span('index.restore', index=name):
+            index.restore(state)
+        return True
+
+    def build_indexes(self):
+        """Build the in-memory indexes from the loaded rows.
+
+        The search index is left to the first search if it can be loaded from
+        the snapshot the rows came from.
+        """
+        self.search_index = None
+        self._search_changes = None
+        if self._snapshot_stamp is not None and self.snapshot.has(self._snapshot_stamp, 'search'):
+            self._search_changes = []
+            self._search_stamp = self._snapshot_stamp
+        elif not self.lazy_index:
+            self.searchable()
+
+    def searchable(self):
+        """Return the search index, loading or building it first if needed."""
+        if self.search_index is not None:
+            return self.search_index
+        with self._search_lock:
+            if self.search_index is None:
+                index = SearchIndex(self.fields, self.key_index, self.indexed_fields)
+                state = None
+                if self._search_changes is not None:
+                    with span('index.load', path=self.snapshot.path) as timing:
+                        state = self.snapshot.load(self._search_stamp, 'search')
+                        timing.set(hit=state is not None)
+                if state is not None:
+                    index.restore(state)
+                    for change in self._search_changes:
+                        index.apply_change(*change)
+                else:
+                    with span('index.build', path=self.path, rows=len(self.rows)):
+                        index.build(self.rows.values())
+                    self._snapshot_stale = self._snapshot_stamp is not None
+                self.search_index = index
+                self._search_changes = None
+            return self.search_index
+
+    def _update_indexes(self, change, key, row):
+        self._forget_snapshot()
+        if self.search_index is None:
+            with self._search_lock:  # Wait for an index being made, then apply the change to it
+                if self.search_index is None:
+                    if self._search_changes is not None:
+                        self._search_changes.append((change, key, row))  # Applied once the index is loaded
+                    return
+        self.search_index.apply_change(change, key, row)
+
+    def _compact(self, row):
+        """Return a copy of row holding just the store's fields, with repeated values interned."""
+        row = list(row[:len(self.fields)])
+        self._intern(row)
+        return row
+
+    def _intern(self, row):
+        intern = sys.intern
+        for index in self._interned:
+            row[index] = intern(row[index])
+
+    def _apply(self, rows, op, key, row):
+        """Apply one journal record to rows; return the rows."""
+        if op != DELETE and len(row) < self.min_length:
+            return rows  # Torn by a crash; the rest of the log is still good
+        if op != DELETE:
+            row = self._compact(row)
+        if op == ADD:
+            rows[key] = row
+        elif op == UPDATE:
+            new_key = row[self.key_index]
+            if new_key != key and key in rows:
+                rows = {(new_key if k == key else k): v for k, v in rows.items()}
+            rows[new_key] = row
+        elif op == DELETE:
+            rows.pop(key, None)
+        return rows
+
+    def refresh(self):
+        """Pick up the changes other processes saved since the rows were read, sending change events for them.
+
+        Returns at once without doing anything while another process holds
+        the lock or this store still has changes waiting to be written; call
+        it again later. Return whether any row changed.
+        """
+        if self.journal is not None and self.journal.pending():
+            return False
+        if not self.lock.acquire(blocking=False):
+            return False
+        with span('store.refresh', 'io', path=self.path) as timing:
+            try:
+                records = None
+                if file_stamp(self.path) == self._base_stamp:
+                    if self.journal is None:
+                        return False
+                    records = self.journal.read_new()
+            finally:
+                self.lock.release()
+            if records is None:
+                # The CSV file was rewritten elsewhere: read everything (not under the lock) and compare
+                self.header, rows = self._read_rows()
+                changes = self._changes(self.rows, rows)
+                self.rows = rows
+            else:
+                changes = []
+                for op, key, row in records:
+                    changes.extend(self._replay_change(op, key, row))
+            timing.set(rows=len(changes))
+        for change in changes:
+            self._notify(*change)
+        return bool(changes)
+
+    def _changes(self, old_rows, new_rows):
+        """Return the change events that turn old_rows into new_rows."""
+        changes = [(REMOVED, key, None) for key in old_rows if key not in new_rows]
+        for key, row in new_rows.items():
+            old_row = old_rows.get(key)
+            if old_row is None:
+                changes.append((INSERTED, key, row))
+            elif old_row != row:
+                changes.append((CHANGED, key, row))
+        return changes
+
+    def _replay_change(self, op, key, row):
+        """Apply one journal record read back from disk; return the change events it makes."""
+        if op != DELETE and len(row) < self.min_length:
+            return []
+        old_row = self.rows.get(key)
+        if op == DELETE:
+            self.rows = self._apply(self.rows, op, key, row)
+            return [(REMOVED, key, None)] if old_row is not None else []
+        new_key = row[self.key_index]
+        changes = []
+        if op == UPDATE and new_key != key and old_row is not None:
+            if new_key not in self.rows:
+                self.rows = self._apply(self.rows, op, key, row)
+                return [(CHANGED, key, self.rows[new_key])]  # A rename, in place
+            changes.append((REMOVED, key, None))  # Renamed onto a key added elsewhere
+        previous = self.rows.get(new_key)
+        self.rows = self._apply(self.rows, op, key, row)
+        row = self.rows[new_key]  # The stored copy
+        if previous is None:
+            changes.append((INSERTED, new_key, row))
+        elif previous != row:
+            changes.append((CHANGED, new_key, row))
+        return changes
+
+    def _record(self, op, key, row=()):
+        """Persist one change, either to the journal or by rewriting the CSV."""
+        if self.journal is None:
+            if op == ADD:
+                self._append_base([row])
+            else:
+                self.save()
+            return
+        self.journal.append(op, key, row)
+        if self.journal.entries >= self.compact_threshold:
+            self.compact(wait=False)
+
+    def _append_base(self, rows):
+        """Append rows to the CSV file and sync it."""
+        with span('csv.append', 'io', path=self.path, rows=len(rows)), self.lock, \
+                open(self.path, "a", newline='', encoding="utf-8") as f:
+            current = file_stamp(f.fileno()) == self._base_stamp
+            csv.writer(f).writerows(rows)
+            f.flush()
+            os.fsync(f.fileno())
+            if current:
+                self._base_stamp = file_stamp(f.fileno())
+
+    def _write_temp(self, header, rows):
+        """Write a complete CSV file next to the real one and sync it; return its path."""
+        directory, name = os.path.split(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=directory)
+        try:
+            keep_mode(fd, self.path)
+            with span('csv.write', 'io', path=self.path) as timing, \
+                    os.fdopen(fd, "w", newline='', encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                count = 0
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+                f.flush()
+                os.fsync(f.fileno())
+                timing.set(rows=count)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return temp_path
+
+    def _write_base(self, rows):
+        """Replace the CSV file with rows: write a temporary file, sync it and rename it over the CSV file."""
+        rows = {row[self.key_index]: row for row in rows}
+        temp_path = self._write_temp(self.header, rows.values())
+        with self.lock:
+            os.replace(temp_path, self.path)
+            fsync_directory(self.path)
+            self._base_stamp = file_stamp(self.path)
+            self._cache_base(self._base_stamp, self.header, rows)
+
+    def _fold_journal(self, snapshot=False):
+        """Rebuild the CSV file from the CSV file and journal on disk, then drop the folded records from the journal.
+
+        With snapshot, the rebuilt rows are also snapshot.
+        """
+        if not self.compact_lock.acquire(blocking=False):
+            return  # Another process is compacting these files
+        try:
+            with self.lock:
+                inode, end = self.journal.end()
+            # Only a compaction replaces the files, so they can be read without the lock
+            header, rows, stamp = self._read_base()
+            for op, key, row in self.journal.read_until(inode, end):
+                rows = self._apply(rows, op, key, row)
+            temp_path = self._write_temp(header, rows.values())
+            try:
+                with self.lock:
+                    if file_stamp(self.path) != stamp:
+                        return  # Rewritten by a process that does not journal; fold on a later try
+                    os.replace(temp_path, self.path)
+                    temp_path = None
+                    fsync_directory(self.path)
+                    folded_stamp = file_stamp(self.path)
+                    self._cache_base(folded_stamp, header, rows)
+                    current = self._base_stamp == stamp
+                    # The journal is trimmed after the CSV is replaced: a crash in between replays records twice, harmlessly
+                    if self.journal.drop_folded(inode, end) and current:
+                        self._base_stamp = folded_stamp
+            finally:
+                if temp_path is not None:
+                    os.remove(temp_path)
+            if snapshot:
+                self._write_snapshot(folded_stamp, {'store': (header, rows, {})})
+        finally:
+            self.compact_lock.release()
+
+    def _write_snapshot(self, stamp, sections):
+        """Write a snapshot of the CSV file version stamp; return whether it was written (it is only a cache)."""
+        try:
+            with span('snapshot.write', 'io', path=self.snapshot.path):
+                self.snapshot.write(stamp, sections)
+        except OSError:
+            return False
+        return True
+
+    def _index_states(self):
+        """Return the states of the indexes saved in snapshots, by name."""
+        return {name: index.state() for name, index in self._snapshot_indexes.items()}
+
+    def _save_snapshot(self):
+        """Snapshot the rows and the indexes over them, if they are exactly what the CSV file holds."""
+        with self.lock:
+            stamp = file_stamp(self.path)
+            if stamp is None or stamp != self._base_stamp or \
+                    (self.journal is not None and self.journal.has_records()):
+                return  # Changes not in the file yet, or changes from elsewhere not in the rows yet
+        if stamp == self._snapshot_stamp and not self._snapshot_stale:
+            return  # Loaded from this very snapshot, and nothing changed
+        if not self.lazy_index:
+            self.searchable()  # Left out, the next load would have to build it
+        sections = {'store': (self.header, self.rows, self._index_states())}
+        if self.search_index is not None:
+            sections['search'] = self.search_index.state()
+        if self._write_snapshot(stamp, sections):
+            self._snapshot_stamp = stamp
+            self._snapshot_stale = False
+
+    def save(self):
+        """Write every row back to the CSV file."""
+        if self.journal is not None:
+            self.compact()
+            return
+        self._write_base(self.rows.values())
+
+    def compact(self, wait=True):
+        """Fold the journal into the CSV file.
+
+        With wait=False the CSV is written on a background thread and the call
+        returns immediately; if a compaction is already running it is left to
+        finish and nothing else happens. A failure there is reported to
+        on_write_error (or left to the thread's excepthook without one); the
+        journal keeps every change and the next compaction tries again. If
+        another process is compacting the same files, this one does nothing.
+        """
+        if self.journal is None:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            if not wait:
+                return
+            self._compactor.join()
+        if wait:
+            self._fold_journal()
+            return
+        self._compactor = threading.Thread(target=self._fold_in_background, daemon=True)
+        self._compactor.start()
+
+    def _fold_in_background(self):
+        # A compaction on close() is followed by a full snapshot; one in the background snapshots just the rows
+        try:
+            self._fold_journal(snapshot=True)
+        except Exception as e:
+            if self.on_write_error is None:
+                raise
+            self.on_write_error(e)
+
+    def close(self):
+        """Flush pending changes to the CSV file and snapshot it."""
+        if self.journal is not None:
+            self.journal.flush()
+            if self.journal.has_records():
+                self.compact()
+            self.journal.close()
+        self._save_snapshot()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def all(self):
+        """Return every row in file order."""
+        return list(self.rows.values())
+
+    def keys(self):
+        """Return every key in file order."""
+        return list(self.rows)
+
+    def get(self, key):
+        """Return the row stored under key, or None."""
+        return self.rows.get(key)
+
+    def matches(self, row, criteria, query):
+        """Check if a row matches the search criteria."""
+        return self.value_matches(criteria, row[self.fields.index(criteria)], query)
+
+    def value_matches(self, criteria, value, query):
+        """Check if one field value matches the search criteria."""
+        return query.lower() in value.lower()
+
+    def search(self, criteria, query):
+        """Return every row matching the search criteria, in file order."""
+        with span('search', criteria=criteria) as timing:
+            if criteria in self.indexed_fields:
+                rows = [self.rows[key] for key in self.searchable().search(criteria, query)]
+            elif criteria in self.interned_fields:
+                # Few distinct values: test each once, then look the rest up
+                column = self.fields.index(criteria)
+                verdicts = {}
+                rows = []
+                for row in self.rows.values():
+                    value = row[column]
+                    matched = verdicts.get(value)
+                    if matched is None:
+                        matched = verdicts[value] = self.value_matches(criteria, value, query)
+                    if matched:
+                        rows.append(row)
+            else:
+                rows = [row for row in self.rows.values() if self.matches(row, criteria, query)]
+            timing.set(rows=len(rows))
+        return rows
+
+    def add(self, row):
+        """Append a new row and persist it."""
+        key = row[self.key_index]
+        if key in self.rows:
+            raise KeyError(f"{self.fields[self.key_index]} {key} already exists.")
+        self.rows[key] = self._compact(row)
+        self._record(ADD, key, self.rows[key])
+        self._notify(INSERTED, key, self.rows[key])
+
+    def add_many(self, rows):
+        """Append several new rows and persist them in one write."""
+        rows = [self._compact(row) for row in rows]
+        keys = [row[self.key_index] for row in rows]
+        if len(set(keys)) != len(keys) or any(key in self.rows for key in keys):
+            raise KeyError(f"Duplicate {self.fields[self.key_index]} in rows to add.")
+        for key, row in zip(keys, rows):
+            self.rows[key] = row
+        if self.journal is None:
+            self._append_base(rows)
+        else:
+            self.journal.append_many([(ADD, key, row) for key, row in zip(keys, rows)])
+            if self.journal.entries >= self.compact_threshold:
+                self.compact(wait=False)
+        for key, row in zip(keys, rows):
+            self._notify(INSERTED, key, row)
+
+    def update(self, key, row):
+        """Replace the row stored under key, keeping its position."""
+        if key not in self.rows:
+            raise KeyError(f"{self.fields[self.key_index]} {key} not found.")
+        new_key = row[self.key_index]
+        if new_key != key:
+            if new_key in self.rows:
+                raise KeyError(f"{self.fields[self.key_index]} {new_key} already exists.")
+            # Rebuild so the renamed row stays where it was
+            self.rows = {(new_key if k == key else k): v for k, v in self.rows.items()}
+        self.rows[new_key] = self._compact(row)
+        self._record(UPDATE, key, self.rows[new_key])
+        self._notify(CHANGED, key, self.rows[new_key])
+
+    def update_many(self, rows):
+        """Replace several rows (keys unchanged) and persist them in one write."""
+        rows = [self._compact(row) for row in rows]
+        for row in rows:
+            if row[self.key_index] not in self.rows:
+                raise KeyError(f"{self.fields[self.key_index]} {row[self.key_index]} not found.")
+        for row in rows:
+            self.rows[row[self.key_index]] = row
+        if self.journal is None:
+            self.save()
+        else:
+            self.journal.append_many([(UPDATE, row[self.key_index], row) for row in rows])
+            if self.journal.entries >= self.compact_threshold:
+                self.compact(wait=False)
+        for row in rows:
+            self._notify(CHANGED, row[self.key_index], row)
+
+    def delete(self, key):
+        """Remove the row stored under key."""
+        if key not in self.rows:
+            raise KeyError(f"{self.fields[self.key_index]} {key} not found.")
+        del self.rows[key]
+        self._record(DELETE, key)
+        self._notify(REMOVED, key)
+
+
+class StudentStore(CsvStore):
+    """Student rows keyed by ID."""
+
+    indexed_fields = ['First Name', 'Last Name', 'ID', 'Course Code']
+    interned_fields = ['First Name', 'Middle Initial', 'Last Name', 'Year Level', 'Gender', 'Course Code']
+
+    def __init__(self, path=STUDENT_DATABASE, **options):
+        super().__init__(path, STUDENT_FIELDS, STUDENT_FIELDS.index('ID'), len(STUDENT_FIELDS), **options)
+
+    def build_indexes(self):
+        super().build_indexes()
+        saved = self._snapshot_states.pop('courses', None)
+        if saved is not None:
+            self.course_index, self._indexed_course = saved
+            return
+        self._snapshot_stale = self._snapshot_stamp is not None
+        self.course_index = {}  # Course Code -> {ID: None} of its students, in enrollment order
+        self._indexed_course = {}  # ID -> Course Code it is indexed under
+        for id_value, row in self.rows.items():
+            self.course_index.setdefault(row[6], {})[id_value] = None
+            self._indexed_course[id_value] = row[6]
+
+    def _index_states(self):
+        states = super()._index_states()
+        states['courses'] = (self.course_index, self._indexed_course)
+        return states
+
+    def _update_indexes(self, change, key, row):
+        super()._update_indexes(change, key, row)
+        if change in (CHANGED, REMOVED):
+            self._unindex_course(key)
+        if change in (INSERTED, CHANGED):
+            self.course_index.setdefault(row[6], {})[row[3]] = None
+            self._indexed_course[row[3]] = row[6]
+
+    def _unindex_course(self, id_value):
+        course_code = self._indexed_course.pop(id_value, None)
+        students = self.course_index.get(course_code)
+        if students is not None:
+            students.pop(id_value, None)
+            if not students:
+                del self.course_index[course_code]
+
+    def is_duplicate_id(self, id_value):
+        """Check if the ID is already used by a student."""
+        return id_value in self.rows
+
+    def matches(self, row, criteria, query):
+        """Check if a student matches the search criteria."""
+        return matches_search_criteria(row, criteria, query)
+
+    def value_matches(self, criteria, value, query):
+        return value_matches(criteria, value, query)
+
+    def roster(self, course_code):
+        """Return the students enrolled in course_code."""
+        return [self.rows[id_value] for id_value in self.course_index.get(course_code, ())]
+
+    def rename_course(self, old_code, new_code):
+        """Move every student of old_code to new_code in one write."""
+        self.update_many([row[:6] + [new_code] for row in self.roster(old_code)])
+
+    def unenroll(self, course_code):
+        """Set the course of every student enrolled in course_code to "None" in one write."""
+        self.rename_course(course_code, "None")
+
+
+class CourseStore(CsvStore):
+    """Course rows keyed by Course Code."""
+
+    indexed_fields = COURSE_FIELDS
+
+    def __init__(self, path=COURSE_DATABASE, **options):
+        super().__init__(path, COURSE_FIELDS, COURSE_FIELDS.index('Course Code'), len(COURSE_FIELDS), **options)
+
+    def has_name(self, course_name, exclude_code=None):
+        """Check if another course already uses course_name."""
+        # The search index groups course keys by lowercased name; only those can match exactly
+        candidates = self.searchable().indexes['Course Name'].keys_by_value.get(course_name.lower(), ())
+        return any(self.rows[code][1] == course_name for code in candidates if code != exclude_code)
@@ -0,0 +1,150 @@
+import re
+from store import STUDENT_FIELDS, COURSE_FIELDS
+
+# Choices offered by the student dialogs
+YEAR_LEVELS = ['1', '2', '3', '4']
+GENDERS = ['Male', 'Female']
+
+# Compiled once; each agrees with the str-method check it replaces for ASCII values
+NAME_PATTERN = re.compile(r'\s*(?:[A-Z][^A-Za-z\s]*[a-z][^A-Z\s]*(?:\s+|\Z))*')
+MIDDLE_INITIAL_PATTERN = re.compile(r'[A-Z]\.')
+ID_PATTERN = re.compile(r'^\d{4}-\d{4}$')
+COURSE_CODE_PATTERN = re.compile(r'[^A-Za-z]*[A-Z][^a-z]*')
+
+
+def validate_name_format(name):
+    """Validate name format: Each part starts with an uppercase letter followed by lowercase letters."""
+    if name.isascii():
+        return NAME_PATTERN.fullmatch(name) is not None
+    return all(part[0].isupper() and part[1:].islower() for part in name.split())
+
+
+def validate_middle_initial(middle_initial):
+    """Validate middle initial format: One uppercase letter followed by a period."""
+    if middle_initial.isascii():
+        return MIDDLE_INITIAL_PATTERN.fullmatch(middle_initial) is not None
+    return len(middle_initial) == 2 and middle_initial[0].isupper() and middle_initial[1] == '.'
+
+
+def validate_course_code(course_code):
+    """Validate course code format: all capital letters."""
+    if course_code.isascii():
+        return COURSE_CODE_PATTERN.fullmatch(course_code) is not None
+    return course_code.isupper()
+
+
+class Rule:
+    """A check on one field and the message shown when it fails.
+
+    The message may use {value}. Empty values pass unless allow_empty is
+    False; whether a field is required is checked separately.
+    """
+
+    def __init__(self, field, check, message, allow_empty=True):
+        self.field = field
+        self.check = check
+        self.message = message
+        self.allow_empty = allow_empty
+
+    def invalid(self, values):
+        """Return the positions of the values that fail; each distinct value is checked once."""
+        check = self.check
+        failing = {value for value in set(values)
+                   if not (value == '' and self.allow_empty) and not check(value)}
+        if not failing:
+            return []
+        return [position for position, value in enumerate(values) if value in failing]
+
+
+class Validator:
+    """Checks rows against per-field rules, a column at a time.
+
+    A single row is validated as a batch of one. Uniqueness is checked last,
+    only for rows that passed everything else, against a taken(value)
+    predicate per unique field (store membership, a set's __contains__, ...)
+    and against the values claimed earlier in the same batch.
+    """
+
+    def __init__(self, fields, rules, required=(), unique=None):
+        self.columns = {field: index for index, field in enumerate(fields)}
+        self.rules = rules
+        self.required = [self.columns[field] for field in required]
+        self.unique = unique or {}  # field -> message when the value is taken
+
+    def errors(self, row, taken=None):
+        """Return the reasons row is invalid (empty if it is valid)."""
+        return self.batch_errors([row], taken)[0]
+
+    def column_errors(self, field, values):
+        """Return {position: [messages]} for a column of values of one field."""
+        errors = {}
+        for rule in self.rules:
+            if rule.field == field:
+                for position in rule.invalid(values):
+                    errors.setdefault(position, []).append(rule.message.format(value=values[position]))
+        return errors
+
+    def batch_errors(self, rows, taken=None):
+        """Return a list of error messages for each row."""
+        errors = [[] for row in rows]
+        if self.required:
+            for row, row_errors in zip(rows, errors):
+                if not all(row[column] for column in self.required):
+                    row_errors.append("Required field is empty.")
+        for rule in self.rules:
+            column = self.columns[rule.field]
+            values = [row[column] for row in rows]
+            for position in rule.invalid(values):
+                errors[position].append(rule.message.format(value=values[position]))
+        if taken:
+            self.unique_errors(rows, errors, taken)
+        return errors
+
+    def unique_errors(self, rows, errors, taken):
+        """Add an error to each valid row whose unique value is taken or repeated; return errors."""
+        for field, is_taken in taken.items():
+            column = self.columns[field]
+            message = self.unique[field]
+            claimed = set()
+            for row, row_errors in zip(rows, errors):
+                if row_errors:
+                    continue
+                value = row[column]
+                if value in claimed or is_taken(value):
+                    row_errors.append(message.format(value=value))
+                else:
+                    claimed.add(value)
+        return errors
+
+
+STUDENT_RULES = [
+    Rule('First Name', validate_name_format, "First name must be capitalized words (Ex. John)."),
+    Rule('Last Name', validate_name_format, "Last name must be capitalized words (Ex. Doe)."),
+    Rule('Middle Initial', validate_middle_initial, "Middle initial must be one capital letter and a period (Ex. A.)."),
+    Rule('ID', ID_PATTERN.match, "ID must look like 2022-0101."),
+    Rule('Year Level', set(YEAR_LEVELS).__contains__, f"Year level must be one of {', '.join(YEAR_LEVELS)}.", allow_empty=False),
+    Rule('Gender', set(GENDERS).__contains__, f"Gender must be one of {', '.join(GENDERS)}.", allow_empty=False),
+]
+STUDENT_UNIQUE = {'ID': "ID {value} already exists. Please enter a unique ID."}
+
+COURSE_RULES = [
+    Rule('Course Code', validate_course_code, "Course code must be all capital letters.", allow_empty=False),
+]
+COURSE_UNIQUE = {
+    'Course Code': "Course code already exists. Please enter a unique course code.",
+    'Course Name': "Course name already exists. Please enter a unique course name.",
+}
+
+STUDENT_VALIDATOR = Validator(STUDENT_FIELDS, STUDENT_RULES,
+                              required=['First Name', 'Middle Initial', 'Last Name', 'ID'], unique=STUDENT_UNIQUE)
+COURSE_VALIDATOR = Validator(COURSE_FIELDS, COURSE_RULES, unique=COURSE_UNIQUE)
+
+
+def student_validator(course_codes=None):
+    """Return the student validator, also checking Course Code against course_codes if given."""
+    if course_codes is None:
+        return STUDENT_VALIDATOR
+    known_codes = set(course_codes) | {'None'}
+    rule = Rule('Course Code', known_codes.__contains__, "Unknown course code {value}.", allow_empty=False)
+    return Validator(STUDENT_FIELDS, STUDENT_RULES + [rule],
+                     required=['First Name', 'Middle Initial', 'Last Name', 'ID'], unique=STUDENT_UNIQUE)